@@ -9,13 +9,12 @@ Dépendances : pycparser (déjà requis par extractor.py)
 """
 from __future__ import annotations
 
+import functools
+import io
 import re
 import sys
 from pathlib import Path
-from textwrap import indent
-from typing import Dict, List, Tuple
-
-from extractor import extract_structs
+from typing import AbstractSet, Dict, Iterable, List, Optional, Tuple
 
 Fields = List[Tuple[str, str]]
 
@@ -24,6 +23,7 @@ Fields = List[Tuple[str, str]]
 # utilitaires -----------------------------------------------------------------
 ###############################################################################
 _star_re = re.compile(r'\*+$')             # cache le pattern
+_strip_stars = re.compile(r"\s*\*+\s*$")
 
 def clean_key(key: str) -> str:
     """ 'struct Foo**'   -> 'Foo'
@@ -45,10 +45,70 @@ def ptr_depth(type_str: str) -> int:
 
 
 def is_struct_type(type_str: str, struct_names: set[str]) -> bool:
-    base = re.sub(r"\s*\*+$", "", type_str).strip()
+    base = _strip_stars.sub("", type_str).strip()
     return base in struct_names
 
 
+_TypeInfo = Tuple[int, str, bool]
+
+
+def _analyze(f_type: str,
+             struct_names: AbstractSet[str],
+             types: Dict[str, _TypeInfo]) -> _TypeInfo:
+    """(profondeur, type de base, struct connue ?) pour un type de champ.
+
+    `types` mémoïse le résultat par chaîne de type ; il ne vaut que pour un
+    même `struct_names` et vit le temps d’une génération.
+    """
+    info = types.get(f_type)
+    if info is None:
+        base = _strip_stars.sub("", f_type).strip()
+        info = types[f_type] = (f_type.count("*"), base, base in struct_names)
+    return info
+
+
+###############################################################################
+# élagage ---------------------------------------------------------------------
+###############################################################################
+def reachable_structs(name_map: Dict[str, Fields],
+                      ptr_map: Dict[str, Fields],
+                      roots: Iterable[str]
+                      ) -> Tuple[Dict[str, Fields], Dict[str, Fields]]:
+    """Restreint `name_map` / `ptr_map` aux types atteignables depuis `roots`.
+
+    Une racine est une clé (« struct Foo », « Foo_t », « pFoo ») ou sa forme
+    `clean_key` (« struct_Foo »). Un alias pointeur n’est gardé que s’il est
+    lui-même racine ; il rend alors atteignable l’alias valeur qu’il appelle.
+    """
+    wanted = set(roots)
+    struct_names = name_map.keys()
+    types: Dict[str, _TypeInfo] = {}
+
+    alias_of: Dict[Tuple[Tuple[str, str], ...], str] = {}
+    for key, fields in name_map.items():
+        alias_of.setdefault(tuple(fields), key)
+
+    kept_ptr = {k: v for k, v in ptr_map.items()
+                if k in wanted or clean_key(k) in wanted}
+    todo = [k for k in name_map if k in wanted or clean_key(k) in wanted]
+    todo.extend(alias_of[tuple(v)] for v in kept_ptr.values()
+                if tuple(v) in alias_of)
+
+    seen: set[str] = set()
+    while todo:
+        key = todo.pop()
+        if key in seen:
+            continue
+        seen.add(key)
+        for f_type, _ in name_map[key]:
+            _, base, is_struct = _analyze(f_type, struct_names, types)
+            if is_struct and base not in seen:
+                todo.append(base)
+
+    kept_names = {k: v for k, v in name_map.items() if k in seen}
+    return kept_names, kept_ptr
+
+
 ###############################################################################
 # génération ------------------------------------------------------------------
 ###############################################################################
@@ -66,95 +126,144 @@ void auto_make_unknown(void* data, size_t size){
 }
 """
 
-ALLOC_TPL = """\
-{ret_type} alloc_{fname}(int d, int max_d)
-{{
-    {struct_type} out = ({struct_type})auto_alloc_safe(sizeof(*out));
-    auto_make_unknown(out, sizeof(*out));
-{body}
-    return out;
-}}
-"""
+def make_alloc_def(ret_type: str, fname: str, struct_type: str, body: str) -> str:
+    """Définition d’un allocateur ; f-string compilée une fois à l’import
+    (pas de ré-analyse du gabarit à chaque struct comme avec str.format)."""
+    return (
+        f"{ret_type} alloc_{fname}(int d, int max_d)\n"
+        f"{{\n"
+        f"    {struct_type} out = ({struct_type})auto_alloc_safe(sizeof(*out));\n"
+        f"    auto_make_unknown(out, sizeof(*out));\n"
+        f"{body}\n"
+        f"    return out;\n"
+        f"}}\n"
+    )
 
 def make_body(fields: Fields,
-              struct_names: set[str]) -> str:
+              struct_names: AbstractSet[str],
+              prefix: str = "    ",
+              types: Optional[Dict[str, _TypeInfo]] = None) -> str:
+    """Corps d’un allocateur, chaque ligne déjà indentée par `prefix`.
+
+    `types` (voir `_analyze`) peut être partagé entre les appels d’une même
+    génération.
+    """
+    if types is None:
+        types = {}
+    inner = prefix + "    "
     lines: List[str] = []
-    lines.append("if(d < max_d - 1) {")
+    lines.append(f"{prefix}if(d < max_d - 1) {{")
     for f_type, f_name in fields:
-        depth = ptr_depth(f_type)
-        base  = re.sub(r"\\s*\\*+$", "", f_type).strip()
+        depth, base, is_struct = _analyze(f_type, struct_names, types)
 
         # ---- pointeur simple vers struct connue → récursif ------------------
-        if depth == 1 and is_struct_type(base, struct_names):
+        if depth == 1 and is_struct:
             callee = clean_key(base)
             lines.append(
-                f"    out->{f_name} = alloc_{callee}(d + 1, max_d);"
+                f"{inner}out->{f_name} = alloc_{callee}(d + 1, max_d);"
             )
         # ---- valeur d’une struct connue -------------------------------------
-        elif depth == 0 and is_struct_type(base, struct_names):
+        elif depth == 0 and is_struct:
             callee = clean_key(base)
             lines.append(
-                f"    out->{f_name} = *alloc_{callee}(d + 1, max_d);"
+                f"{inner}out->{f_name} = *alloc_{callee}(d + 1, max_d);"
             )
         # ---- sinon : mémoire inconnue ---------------------------------------
         elif depth == 1 and not "[" in f_type and not "[" in f_name:
             lines.append(
-                f"    out->{f_name} = auto_alloc_safe(128);"
+                f"{inner}out->{f_name} = auto_alloc_safe(128);"
             )
             lines.append(
-                f"    auto_make_unknown(out->{f_name}, 128);"
+                f"{inner}auto_make_unknown(out->{f_name}, 128);"
             )
         else:
             # champ scalaire : rien à faire, on l’a déjà « unknown-é »
             pass
-    lines.append("    }")
+    lines.append(f"{inner}}}")
     return "\n".join(lines)
 
 
-def generate_allocators(name_map: Dict[str, Fields],
-                        ptr_map: Dict[str, Fields]) -> str:
-    struct_names = set(name_map)  # toutes les alias « valeur »
-    parts: List[str] = [PRELUDE]
-
-    for iter in [0,1]:
-        # 1) d’abord les alias valeur (inclut « struct Foo »)
-        for key, fields in name_map.items():
-            fname       = clean_key(key)
-            struct_type = f"{key}*" 
-            ret_type    = struct_type
-            body        = make_body(fields, struct_names)
-            if iter == 0: 
-                parts.append(f"{ret_type} alloc_{fname}(int d, int max_d);\n")
-            else:
-                parts.append(
-                    ALLOC_TPL.format(
-                        ret_type=ret_type,
-                        fname=fname,
-                        struct_type=struct_type,
-                        body=indent(body, "    "),
-                    )
-                )
-
-        # 2) puis les alias pointeurs simples  -----------------------------------
-        for key, fields in ptr_map.items():
-            fname    = clean_key(key)
-            # retrouve le vrai nom de struct pour appeler le bon alloc_…
-            # (on suppose qu’au moins un alias valeur possède exactement le même
-            #   tableau de champs).
-            target_alias = next(
-                k for k, v in name_map.items() if v == fields
+def _generate_allocators(name_map: Dict[str, Fields],
+                         ptr_map: Dict[str, Fields]) -> str:
+    struct_names = name_map.keys()  # toutes les alias « valeur »
+    types: Dict[str, _TypeInfo] = {}
+    # prototypes et définitions sont produits en une seule passe, chacun
+    # dans son propre tampon (chaque bloc est précédé d’une ligne vide)
+    decls = io.StringIO()
+    defs = io.StringIO()
+
+    # 1) d’abord les alias valeur (inclut « struct Foo »)
+    # extract_structs partage la même liste de champs entre « struct Foo » et
+    # ses typedefs : seul le premier alias reçoit un corps complet, les autres
+    # deviennent de simples relais. (Deux structs distinctes aux champs égaux
+    # ne sont pas fusionnées : largeur des bit-fields / union vs struct
+    # peuvent différer.)
+    primary_of: Dict[int, str] = {}
+    for key, fields in name_map.items():
+        fname       = clean_key(key)
+        struct_type = f"{key}*"
+        ret_type    = struct_type
+        decls.write(f"\n{ret_type} alloc_{fname}(int d, int max_d);\n")
+        primary = primary_of.setdefault(id(fields), fname)
+        if primary != fname:
+            defs.write(
+                f"\n{ret_type} alloc_{fname}(int d, int max_d)\n{{\n"
+                f"    return alloc_{primary}(d, max_d);\n"
+                f"}}\n"
             )
-            callee = clean_key(target_alias)
-            if iter == 0: 
-                parts.append(f"{key} alloc_{fname}(int d, int max_d);\n")
-            else:
-                parts.append(
-                    f"{key} alloc_{fname}(int d, int max_d)\n{{\n"
-                    f"    return alloc_{callee}(d, max_d);\n"
-                    f"}}\n"
-                )
+            continue
+        body        = make_body(fields, struct_names, types=types)
+        defs.write("\n")
+        defs.write(make_alloc_def(ret_type, fname, struct_type, body))
 
-    return "\n".join(parts)
+    # 2) puis les alias pointeurs simples  -----------------------------------
+    # index inverse champs -> premier alias valeur (on suppose qu’au moins un
+    # alias valeur possède exactement le même tableau de champs).
+    alias_of: Dict[Tuple[Tuple[str, str], ...], str] = {}
+    for key, fields in name_map.items():
+        alias_of.setdefault(tuple(fields), key)
 
+    for key, fields in ptr_map.items():
+        fname    = clean_key(key)
+        # retrouve le vrai nom de struct pour appeler le bon alloc_…
+        callee = clean_key(alias_of[tuple(fields)])
+        decls.write(f"\n{key} alloc_{fname}(int d, int max_d);\n")
+        defs.write(
+            f"\n{key} alloc_{fname}(int d, int max_d)\n{{\n"
+            f"    return alloc_{callee}(d, max_d);\n"
+            f"}}\n"
+        )
 
+    return PRELUDE + decls.getvalue() + defs.getvalue()
 
+
+# Signature d’une paire de tables : (clé, champs, rang du premier alias qui
+# partage la même liste) dans l’ordre d’origine — la sortie dépend de l’ordre
+# et du partage des listes (relais entre alias), pas seulement des valeurs.
+_NameSig = Tuple[Tuple[str, Tuple[Tuple[str, str], ...], int], ...]
+_PtrSig = Tuple[Tuple[str, Tuple[Tuple[str, str], ...]], ...]
+
+
+@functools.lru_cache(maxsize=128)
+def _generate_allocators_cached(name_sig: _NameSig, ptr_sig: _PtrSig) -> str:
+    lists: Dict[int, Fields] = {}
+    name_map = {key: lists.setdefault(first, list(fields))
+                for key, fields, first in name_sig}
+    ptr_map = {key: list(fields) for key, fields in ptr_sig}
+    return _generate_allocators(name_map, ptr_map)
+
+
+def generate_allocators(name_map: Dict[str, Fields],
+                        ptr_map: Dict[str, Fields]) -> str:
+    """
+    Code C des allocateurs de *name_map* / *ptr_map*, mémoïsé sur leur
+    signature : des tables identiques (même contenu, même ordre, mêmes
+    listes partagées) ne sont générées qu’une fois.
+    """
+    first_of: Dict[int, int] = {}
+    name_sig = tuple(
+        (key, tuple(map(tuple, fields)), first_of.setdefault(id(fields), i))
+        for i, (key, fields) in enumerate(name_map.items())
+    )
+    ptr_sig = tuple((key, tuple(map(tuple, fields))) for key, fields in ptr_map.items())
+    return _generate_allocators_cached(name_sig, ptr_sig)
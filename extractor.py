@@ -1,31 +1,47 @@
 from __future__ import annotations
 
 import os
+import re
 import sys
+import copy
 import json
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 ###############################################################################
 # libclang loading                                                             #
 ###############################################################################
 
+# USE_PYLIBCLANG=1 selects the pybind11-based `pylibclang` binding when it is
+# installed (its cindex mirrors clang.cindex and bundles its own libclang);
+# otherwise the ctypes-based `clang` binding is used.
+_USE_PYLIBCLANG = os.environ.get("USE_PYLIBCLANG") == "1"
+
 try:
-    from clang import cindex
-    from clang.cindex import (
-        Cursor,
-        CursorKind,
-        Index,
-        TranslationUnit,
-        Type,
-        TypeKind,
-    )
+    if _USE_PYLIBCLANG:
+        try:
+            from pylibclang import cindex  # type: ignore
+        except ImportError:
+            _USE_PYLIBCLANG = False
+    if not _USE_PYLIBCLANG:
+        from clang import cindex
+    Cursor = cindex.Cursor
+    CursorKind = cindex.CursorKind
+    Index = cindex.Index
+    TranslationUnit = cindex.TranslationUnit
+    Type = cindex.Type
+    TypeKind = cindex.TypeKind
 except Exception as exc:  # pragma: no cover
     raise ImportError(
         "libclang is required. Install the `clang` wheel or set CLANG_LIBRARY_FILE"
     ) from exc
 
-if "CLANG_LIBRARY_FILE" in os.environ: # pragma: no cover
+if "CLANG_LIBRARY_FILE" in os.environ and not _USE_PYLIBCLANG: # pragma: no cover
     cindex.Config.set_library_file(os.environ["CLANG_LIBRARY_FILE"])
 
 ###############################################################################
@@ -33,7 +49,8 @@ if "CLANG_LIBRARY_FILE" in os.environ: # pragma: no cover
 ###############################################################################
 
 Fields = List[Tuple[str, str]]  # [(type_string, field_name)]
-__all__ = ["extract_structs", "Fields"]
+__all__ = ["extract_structs", "extract_structs_from_source", "extract_structs_many",
+           "extract_structs_batch", "Fields"]
 
 ###############################################################################
 # Helpers                                                                      #
@@ -46,194 +63,689 @@ def is_in_system_header(cursor: Cursor) -> bool:
     filepath = location.file.name
     return filepath.startswith("/usr/include") or "lib/clang" in filepath
 
+# clang_visitChildren visitor results.
+_BREAK = 0
+_CONTINUE = 1
+_RECURSE = 2
+
+
+def _visit(root: Cursor, visitor) -> None:
+    """
+    Pre-order traversal of *root*'s descendants in a single
+    clang_visitChildren call. ``visitor(cursor, parent)`` returns _RECURSE
+    to descend into *cursor* or _CONTINUE to skip its children.
+    """
+    if not hasattr(cindex, "callbacks"):  # pragma: no cover - non-ctypes binding
+        stack = [(child, root) for child in reversed(list(root.get_children()))]
+        while stack:
+            cursor, parent = stack.pop()
+            if visitor(cursor, parent) == _RECURSE:
+                stack.extend((child, cursor) for child in reversed(list(cursor.get_children())))
+        return
+
+    tu = root._tu
+    errors: List[BaseException] = []
+
+    def callback(cursor, parent, _data):
+        # Keep the TU alive for as long as the cursor is, as get_children does.
+        cursor._tu = tu
+        try:
+            return visitor(cursor, parent)
+        except BaseException as exc:  # ctypes would swallow it
+            errors.append(exc)
+            return _BREAK
+
+    cindex.conf.lib.clang_visitChildren(root, cindex.callbacks["cursor_visit"](callback), None)
+    if errors:
+        raise errors[0]
+
+
 def _ptr_depth(t: Type) -> Tuple[int, Type]:
+    # The pointee of a canonical pointer is already canonical.
+    current_type = t.get_canonical()
     depth = 0
-    current_type = t
-    
-    while True:
-        canonical_form = current_type.get_canonical()
-        
-        if canonical_form.kind == TypeKind.POINTER:
-            depth += 1
-            current_type = canonical_form.get_pointee() 
-        else:
-            current_type = canonical_form 
-            break
-            
+    while current_type.kind == TypeKind.POINTER:
+        depth += 1
+        current_type = current_type.get_pointee()
     return depth, current_type
 
 
-def _type_to_str_revised(t: Type, *, struct_decl_hash_to_identifier: Dict[int, str]) -> str:
-    kind = t.kind
-    
-    if kind == TypeKind.POINTER:
-        return _type_to_str_revised(t.get_pointee(), struct_decl_hash_to_identifier=struct_decl_hash_to_identifier) + "*"
-    
-    if kind == TypeKind.CONSTANTARRAY or kind == TypeKind.INCOMPLETEARRAY or kind == TypeKind.VARIABLEARRAY or kind == TypeKind.DEPENDENTSIZEDARRAY:
-        element_type_str = _type_to_str_revised(t.element_type, struct_decl_hash_to_identifier=struct_decl_hash_to_identifier)
-        return f"{element_type_str}[]"
+_STRUCT_KINDS = frozenset({CursorKind.STRUCT_DECL, CursorKind.UNION_DECL})
+
+_ARRAY_KINDS = frozenset({
+    TypeKind.CONSTANTARRAY,
+    TypeKind.INCOMPLETEARRAY,
+    TypeKind.VARIABLEARRAY,
+    TypeKind.DEPENDENTSIZEDARRAY,
+})
+
 
-    if kind == TypeKind.RECORD: 
+def _type_to_str_revised(t: Type) -> str:
+    # Walk pointer / array / elaborated wrappers iteratively, collecting the
+    # "*" / "[]" suffixes outermost-first; they are emitted innermost-first.
+    # TypeKind members are singletons: compare by identity.
+    POINTER = TypeKind.POINTER
+    ELABORATED = TypeKind.ELABORATED
+    suffix: List[str] = []
+    while True:
+        kind = t.kind
+
+        if kind is POINTER:
+            suffix.append("*")
+            t = t.get_pointee()
+            continue
+
+        if kind in _ARRAY_KINDS:
+            suffix.append("[]")
+            t = t.element_type
+            continue
+
+        if kind is ELABORATED:
+            t = t.get_named_type()
+            continue
+
+        break
+
+    if kind is TypeKind.RECORD: 
         decl = t.get_declaration()
-        identifier = struct_decl_hash_to_identifier.get(decl.hash)
-        if not identifier: 
-            identifier = decl.spelling or f"unresolved_anon_{decl.hash}"
+        # Anonymous records only get a name when one is actually printed.
+        identifier = decl.spelling or f"anon_{decl.hash}"
         
         # Determine prefix based on actual kind (struct or union)
         prefix = "struct"
         if decl.kind == CursorKind.UNION_DECL: # pragma: no cover
              prefix = "union"
-        return f"{prefix} {identifier}"
+        base = f"{prefix} {identifier}"
 
-    if kind == TypeKind.TYPEDEF:
-        return t.spelling
+    elif kind is TypeKind.TYPEDEF:
+        base = t.spelling
 
-    if kind == TypeKind.ELABORATED:
-        return _type_to_str_revised(t.get_named_type(), struct_decl_hash_to_identifier=struct_decl_hash_to_identifier)
-        
-    if kind == TypeKind.ENUM:
+    elif kind is TypeKind.ENUM:
         decl = t.get_declaration()
         if decl.spelling:
-            return f"enum {decl.spelling}"
-        return "enum <anonymous>" 
+            base = f"enum {decl.spelling}"
+        else:
+            base = "enum <anonymous>" 
 
-    return t.spelling
+    else:
+        base = t.spelling
 
+    return base + "".join(reversed(suffix))
 
-###############################################################################
-# Public API                                                                   #
-###############################################################################
 
-def extract_structs(source: str | Path,
-                               clang_args: Optional[Sequence[str]] = None
-                               ) -> Tuple[Dict[str, Fields], Dict[str, Fields]]:
-    clang_args = list(clang_args or [])
+# Only declarations are read: function bodies are skipped, and the TU is
+# marked incomplete so libclang drops its end-of-TU checks.
+_PARSE_OPTIONS = (TranslationUnit.PARSE_SKIP_FUNCTION_BODIES
+                  | TranslationUnit.PARSE_INCOMPLETE)
+
+_INDEX: Optional[Index] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def _index() -> Index:
+    """The libclang index shared by every parse of this process."""
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = Index.create()
+    return _INDEX
 
+
+# Name under which in-memory sources are handed to libclang by default.
+_VIRTUAL_FILE = "virtual_file.c"
+
+
+def _parse(source: str | Path, clang_args: Sequence[str],
+           index: Optional[Index] = None,
+           filename: str = _VIRTUAL_FILE) -> TranslationUnit:
+    index = index or _index()
     if isinstance(source, Path):
-        print(f"Parsing source file: {source}", file=sys.stderr)
-        if not source.exists():
-            raise FileNotFoundError(f"Source file not found: {source}")
-        tu = Index.create().parse(
+        tu = index.parse(
             str(source),
             args=clang_args,
-            options=TranslationUnit.PARSE_DETAILED_PROCESSING_RECORD,
+            options=_PARSE_OPTIONS,
         )
     else: 
-        tu = Index.create().parse(
-            "virtual_file.c", 
+        tu = index.parse(
+            filename,
             args=clang_args,
-            unsaved_files=[("virtual_file.c", source)],
-            options=TranslationUnit.PARSE_DETAILED_PROCESSING_RECORD,
+            unsaved_files=[(filename, source)],
+            options=_PARSE_OPTIONS,
         )
     
     if not tu: # pragma: no cover
         raise RuntimeError("libclang failed to parse the translation unit.")
+    return tu
+
+
+def _ast_cache_path(cache_dir: str | Path, source_key: bytes,
+                    clang_args: Sequence[str]) -> Path:
+    digest = hashlib.blake2b(source_key + repr(list(clang_args)).encode("utf-8"),
+                             digest_size=20)
+    return Path(cache_dir) / f"{digest.hexdigest()}.ast"
+
+
+def _deps_path(cache_path: Path) -> Path:
+    return cache_path.with_suffix(".deps")
+
+
+def _file_stamp(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+# [(included file, [mtime_ns, size] or None)] for one translation unit.
+_Deps = List[Tuple[str, Optional[List[int]]]]
+
+
+def _include_stamps(tu: TranslationUnit) -> _Deps:
+    deps: Dict[str, Optional[List[int]]] = {}
+    for inclusion in tu.get_includes():
+        name = inclusion.include.name
+        if name not in deps:
+            deps[name] = _file_stamp(name)
+    return list(deps.items())
+
+
+def _stamps_are_fresh(deps: _Deps) -> bool:
+    return all(_file_stamp(name) == stamp for name, stamp in deps)
+
+
+def _deps_are_fresh(cache_path: Path) -> bool:
+    """
+    The cache key only covers the main source; included files are recorded
+    in a sidecar with their mtime and size at save time.
+    """
+    try:
+        deps = json.loads(_deps_path(cache_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return _stamps_are_fresh(deps)
+
+
+def _load_cached_ast(cache_path: Path,
+                     index: Optional[Index] = None) -> Optional[TranslationUnit]:
+    if not cache_path.is_file() or not _deps_are_fresh(cache_path):
+        return None
+    try:
+        return TranslationUnit.from_ast_file(str(cache_path), index or _index())
+    except cindex.TranslationUnitLoadError:
+        # Corrupt or incompatible cache entry: fall back to a fresh parse.
+        print(f"WARNING: ignoring unreadable AST cache {cache_path}", file=sys.stderr)
+        return None
+
+
+def _save_cached_ast(tu: TranslationUnit, cache_path: Path,
+                     deps: Optional[_Deps] = None) -> None:
+    if deps is None:
+        deps = _include_stamps(tu)
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_deps = cache_path.with_suffix(f".{os.getpid()}.deps.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tu.save(str(tmp_path))
+        tmp_deps.write_text(json.dumps(deps), encoding="utf-8")
+        # The sidecar goes last: an entry without one is never loaded.
+        os.replace(tmp_path, cache_path)
+        os.replace(tmp_deps, _deps_path(cache_path))
+    except (OSError, cindex.TranslationUnitSaveError) as exc:
+        print(f"WARNING: could not write AST cache {cache_path}: {exc}", file=sys.stderr)
+
+
+###############################################################################
+# Fast path for trivial inputs                                                 #
+###############################################################################
+
+# A lone `struct X { ... };` / `typedef struct [X] { ... } Y;` whose fields are
+# plain builtins (or pointers to structs) does not need libclang at all, nor
+# does a source of forward declarations and typedefs, which cannot define a
+# struct. Any input outside those narrow shapes, or parsed with clang
+# arguments, falls through to the real parser.
+_SIMPLE_STRUCT_RE = re.compile(
+    r"\A\s*(typedef\s+)?struct\s+(\w+)?\s*\{([^{}]*)\}\s*(\w+)?\s*;\s*\Z"
+)
+# Blanks or at least one `*` must separate the type from the name, so that
+# `charx` is never read as `char x`.
+_SIMPLE_FIELD_RE = re.compile(
+    r"\A\s*((?:\w+\s+)*?\w+)(\s*(?:\*\s*)+|\s+)(\w+)\s*((?:\[\s*[1-9][0-9]*\s*\]\s*)*)\Z"
+)
+_IDENT_RE = re.compile(r"\A[A-Za-z_]\w*\Z")
+# Brace-free sources: forward declarations and typedefs only.
+_FWD_DECL_RE = re.compile(r"\A\s*struct\s+(\w+)\s*\Z")
+_TYPEDEF_RE = re.compile(r"\A\s*typedef\s+((?:\w+\s+)*?\w+)(\s*(?:\*\s*)+|\s+)(\w+)\s*\Z")
+
+# Spellings libclang reports unchanged; "long int", "unsigned" & co. are not
+# listed and take the slow path.
+_SIMPLE_BUILTINS = frozenset({
+    "char", "signed char", "unsigned char", "short", "unsigned short",
+    "int", "unsigned int", "long", "unsigned long", "long long",
+    "unsigned long long", "float", "double", "long double", "_Bool", "void",
+})
+
+_C_KEYWORDS = frozenset({
+    "auto", "break", "case", "char", "const", "continue", "default", "do",
+    "double", "else", "enum", "extern", "float", "for", "goto", "if",
+    "inline", "int", "long", "register", "restrict", "return", "short",
+    "signed", "sizeof", "static", "struct", "switch", "typedef", "union",
+    "unsigned", "void", "volatile", "while", "_Bool", "_Complex",
+    "_Imaginary", "_Alignas", "_Alignof", "_Atomic", "_Generic",
+    "_Noreturn", "_Static_assert", "_Thread_local",
+    # C23
+    "alignas", "alignof", "bool", "constexpr", "false", "nullptr",
+    "static_assert", "thread_local", "true", "typeof_unqual",
+    # GNU extensions; the `__asm__`-style spellings are rejected by _is_name
+    "asm", "typeof",
+})
+
+
+def _is_name(word: Optional[str]) -> bool:
+    # Names reserved to the implementation (`_Foo`, `__foo`) may be keywords
+    # or builtins of this libclang version: leave them to the parser.
+    return (bool(word) and word not in _C_KEYWORDS and not word.startswith("__")
+            and not (word[0] == "_" and word[1:2].isupper())
+            and bool(_IDENT_RE.match(word)))
+
+
+def _only_declarations(source: str) -> bool:
+    """True if *source* is only `struct X;` and `typedef <type> Y;` lines."""
+    *decls, tail = source.split(";")
+    if tail.strip():
+        return False
+    typedefs = set()
+    for decl in decls:
+        fm = _FWD_DECL_RE.match(decl)
+        if fm is not None:
+            if not _is_name(fm.group(1)):
+                return False
+            continue
+        fm = _TYPEDEF_RE.match(decl)
+        if fm is None:
+            return False
+        base, _, name = fm.groups()
+        base = " ".join(base.split())
+        if base.startswith("struct "):
+            if not _is_name(base[7:]):
+                return False
+        elif base not in _SIMPLE_BUILTINS:
+            return False
+        # a redefinition may conflict: leave it to libclang
+        if not _is_name(name) or name in typedefs:
+            return False
+        typedefs.add(name)
+    return True
+
+
+def _extract_simple_struct(source: str) -> Optional[Tuple[Dict[str, Fields], Dict[str, Fields]]]:
+    """
+    Return what libclang would report for *source* if it is a single trivial
+    struct definition or only forward declarations and typedefs, ``None``
+    otherwise. Only valid
+    for a source parsed without clang arguments: macros given with -D or
+    -include may expand into struct definitions. The accepted definitions are
+    valid C, for which libclang would have no diagnostic to print.
+    """
+    if "#" in source or "%:" in source or "/" in source:
+        return None
+    if "{" not in source and "<%" not in source:
+        # Without a brace nothing defines a struct; the declarations must
+        # still be well-formed, or libclang has diagnostics to report.
+        return ({}, {}) if _only_declarations(source) else None
+    m = _SIMPLE_STRUCT_RE.match(source)
+    if m is None:
+        return None
+    is_typedef, tag, body, alias = m.groups()
+    # Without `typedef`, a trailing name declares a variable, not an alias.
+    if bool(is_typedef) != bool(alias) or not (tag or alias):
+        return None
+    if (tag and not _is_name(tag)) or (alias and not _is_name(alias)):
+        return None
+
+    *decls, tail = body.split(";")
+    if not decls or tail.strip():
+        return None
+    fields: Fields = []
+    seen = set()
+    for decl in decls:
+        fm = _SIMPLE_FIELD_RE.match(decl)
+        if fm is None:
+            return None
+        base, sep, name, dims = fm.groups()
+        base = " ".join(base.split())
+        stars = "*" * sep.count("*")
+        if base.startswith("struct "):
+            # Only pointers: the pointee may be incomplete.
+            if not stars or not _is_name(base[7:]):
+                return None
+        elif base not in _SIMPLE_BUILTINS or (base == "void" and not stars):
+            return None
+        if not _is_name(name) or name in seen:
+            return None
+        seen.add(name)
+        type_str = base + stars + "[]" * dims.count("[")
+        fields.append((sys.intern(type_str), sys.intern(name)))
+
+    name_to_struct: Dict[str, Fields] = {}
+    if tag:
+        name_to_struct[sys.intern(f"struct {tag}")] = fields
+    if alias:
+        name_to_struct[sys.intern(alias)] = fields
+    return name_to_struct, {}
+
+
+###############################################################################
+# Public API                                                                   #
+###############################################################################
+
+def extract_structs(source: str | Path,
+                               clang_args: Optional[Sequence[str]] = None,
+                               *,
+                               cache_dir: Optional[str | Path] = None,
+                               index: Optional[Index] = None,
+                               filename: str = _VIRTUAL_FILE,
+                               ) -> Tuple[Dict[str, Fields], Dict[str, Fields]]:
+    """
+    Parse *source* (a file path or in-memory C code) and return
+    ``(name_to_struct, pointer_to_struct)``.
+
+    Results are memoized in-process, keyed by the source (path, mtime, size
+    and a digest of the content for files) and *clang_args*, and parsed again
+    once a file they include has changed; callers get their own copy.
+
+    With *cache_dir*, the parsed translation unit is saved there as an AST
+    file keyed by the source content and *clang_args*, and reloaded instead
+    of re-parsed on later calls as long as the files it includes are
+    unchanged.
+
+    Parses go through *index* when given, else through an index shared by
+    the whole process.
+
+    In-memory code is parsed from an unsaved-file buffer named *filename*;
+    nothing is written to disk.
+    """
+    stamp: Optional[Tuple[str, int, int, bytes]] = None
+    if isinstance(source, Path):
+        if not source.exists():
+            raise FileNotFoundError(f"Source file not found: {source}")
+        st = source.stat()
+        # The digest catches rewrites that keep both mtime and size (coarse
+        # timestamps, restored mtimes).
+        digest = hashlib.blake2b(source.read_bytes(), digest_size=16).digest()
+        stamp = (str(source.resolve()), st.st_mtime_ns, st.st_size, digest)
+    clang_args = tuple(clang_args or ())
+    key = (source, stamp, clang_args, cache_dir, index, filename)
+    with _MEMO_LOCK:
+        entry = _MEMO.get(key)
+        if entry is not None:
+            _MEMO.move_to_end(key)
+    # The key only stamps the main file; an entry whose includes changed
+    # since it was made is parsed again.
+    if entry is None or not _stamps_are_fresh(entry[1]):
+        entry = _extract_structs_uncached(source, clang_args, cache_dir, index, filename)
+        with _MEMO_LOCK:
+            _MEMO[key] = entry
+            _MEMO.move_to_end(key)
+            while len(_MEMO) > _MEMO_SIZE:
+                _MEMO.popitem(last=False)
+    # deepcopy keeps aliases of one struct sharing a single field list.
+    return copy.deepcopy(entry[0])
+
+
+
+def extract_structs_from_source(source: str,
+                                clang_args: Optional[Sequence[str]] = None,
+                                *,
+                                filename: str = _VIRTUAL_FILE,
+                                **kwargs,
+                                ) -> Tuple[Dict[str, Fields], Dict[str, Fields]]:
+    """
+    :func:`extract_structs` on in-memory C code: *source* is parsed from an
+    unsaved-file buffer named *filename* and never written to disk.
+
+    Unlike :func:`extract_structs`, a path is rejected rather than read, so
+    callers holding code as text cannot end up on the file path by mistake.
+    """
+    if not isinstance(source, str):
+        raise TypeError(f"expected C source text, got {type(source).__name__}")
+    return extract_structs(source, clang_args, filename=filename, **kwargs)
+
+
+def _one(path: Path, clang_args: Tuple[str, ...],
+         cache_dir: Optional[str | Path] = None,
+         ) -> Tuple[Dict[str, Fields], Dict[str, Fields]]:
+    return extract_structs(path, clang_args, cache_dir=cache_dir)
+
+
+def extract_structs_many(paths: Iterable[str | Path],
+                         clang_args: Optional[Sequence[str]] = None,
+                         max_workers: Optional[int] = None,
+                         *,
+                         cache_dir: Optional[str | Path] = None,
+                         ) -> Dict[Path, Tuple[Dict[str, Fields], Dict[str, Fields]]]:
+    """
+    Run :func:`extract_structs` on each file of *paths*, one parse per worker
+    process, and return ``{path: (name_to_struct, pointer_to_struct)}``.
+
+    With the ``fork`` start method (the Linux default) workers inherit the
+    parent's loaded libclang, shared ``Index`` and extraction memo; with
+    ``spawn`` (macOS, Windows) they import this module again, which honours
+    ``CLANG_LIBRARY_FILE`` there as well. Either way, what a worker memoizes
+    is not sent back to the parent.
+    """
+    paths = [Path(p) for p in paths]
+    clang_args = tuple(clang_args or ())
+    if len(paths) <= 1 or max_workers == 1:
+        return {p: extract_structs(p, clang_args, cache_dir=cache_dir) for p in paths}
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        return dict(zip(paths, ex.map(_one, paths, repeat(clang_args), repeat(cache_dir))))
+
+
+def extract_structs_batch(headers: Iterable[str | Path],
+                          clang_args: Optional[Sequence[str]] = None,
+                          ) -> Dict[Path, Tuple[Dict[str, Fields], Dict[str, Fields]]]:
+    """
+    Parse *headers* together through one umbrella translation unit, so that
+    their shared includes are only preprocessed once, and return
+    ``{header: (name_to_struct, pointer_to_struct)}``.
+
+    Each struct and typedef is attributed to the header that declares it;
+    declarations coming from other included files are left out.
+    """
+    headers = [Path(h) for h in headers]
+    for header in headers:
+        if not header.exists():
+            raise FileNotFoundError(f"Source file not found: {header}")
+    umbrella = "\n".join(f'#include "{h.resolve()}"' for h in headers) + "\n"
+    print(f"Parsing {len(headers)} files as one translation unit", file=sys.stderr)
+    tu = _parse(umbrella, tuple(clang_args or ()))
+    _report_diagnostics(tu)
+    by_file = _collect_structs(tu, by_file=True)
+    return {h: by_file.get(str(h.resolve()), ({}, {})) for h in headers}
+
+
+# In-process memo of extract_structs: key -> (maps, include stamps), in LRU
+# order.
+_MEMO: "OrderedDict[tuple, Tuple[Tuple[Dict[str, Fields], Dict[str, Fields]], _Deps]]" = OrderedDict()
+_MEMO_SIZE = 64
+_MEMO_LOCK = threading.Lock()
+
+
+def _clear_memo() -> None:
+    with _MEMO_LOCK:
+        _MEMO.clear()
+
+
+def _extract_structs_uncached(source: str | Path,
+                              clang_args: Tuple[str, ...],
+                              cache_dir: Optional[str | Path],
+                              index: Optional[Index] = None,
+                              filename: str = _VIRTUAL_FILE,
+                              ) -> Tuple[Tuple[Dict[str, Fields], Dict[str, Fields]], _Deps]:
+    # Any clang argument (-D, -U, -x, -std, ...) may change how the text is
+    # read, so the fast path only applies to a bare source.
+    if isinstance(source, str) and not clang_args:
+        simple = _extract_simple_struct(source)
+        if simple is not None:
+            return simple, []
+
+    cache_path: Optional[Path] = None
+    if isinstance(source, Path):
+        print(f"Parsing source file: {source}", file=sys.stderr)
+        if cache_dir is not None:
+            source_key = str(source.resolve()).encode("utf-8") + b"\0" + source.read_bytes()
+            cache_path = _ast_cache_path(cache_dir, source_key, clang_args)
+    elif cache_dir is not None:
+        # the buffer name matters to relative #include lookups
+        source_key = source.encode("utf-8")
+        if filename != _VIRTUAL_FILE:
+            source_key = filename.encode("utf-8") + b"\0" + source_key
+        cache_path = _ast_cache_path(cache_dir, source_key, clang_args)
+
+    tu = _load_cached_ast(cache_path, index) if cache_path is not None else None
+    deps = None
+    if tu is None:
+        tu = _parse(source, clang_args, index, filename)
+        deps = _include_stamps(tu)
+        if cache_path is not None:
+            _save_cached_ast(tu, cache_path, deps)
+    _report_diagnostics(tu)
+    if deps is None:
+        deps = _include_stamps(tu)
+    return _collect_structs(tu).get(None, ({}, {})), deps
+
+
+def _report_diagnostics(tu: TranslationUnit) -> None:
     for diagnostic in tu.diagnostics:
         if diagnostic.severity >= cindex.Diagnostic.Error:
             print(f"ERROR: {diagnostic.location}: {diagnostic.spelling}", file=sys.stderr)
         elif diagnostic.severity >= cindex.Diagnostic.Warning:
             print(f"WARNING: {diagnostic.location}: {diagnostic.spelling}", file=sys.stderr)
 
-    struct_fields_map: Dict[str, Fields] = {}
-    struct_decl_hash_to_identifier: Dict[int, str] = {}
-    name_to_struct: Dict[str, Fields] = {}
-    pointer_to_struct: Dict[str, Fields] = {}
-
-    # --- Pass 1: Pre-scan for all struct (and union) declaration identifiers ---
-    # (Using the original Pass 1 logic from the problem description)
-    def prescan_struct_identifiers_recursive(cursor: Cursor):
-        if cursor.kind == CursorKind.STRUCT_DECL or cursor.kind == CursorKind.UNION_DECL:
-            decl_hash = cursor.hash
-            if cursor.spelling: 
-                struct_decl_hash_to_identifier[decl_hash] = cursor.spelling
-            else: 
-                anon_name = f"anon_{decl_hash}" 
-                struct_decl_hash_to_identifier[decl_hash] = anon_name
-        
-        for child in cursor.get_children():
-            prescan_struct_identifiers_recursive(child)
-    
-    prescan_struct_identifiers_recursive(tu.cursor)
 
-    # --- Pass 2: Collect struct (and union) definitions and their fields ---
-    def collect_struct_definitions_recursive(cursor: Cursor):
-        if (cursor.kind == CursorKind.STRUCT_DECL or cursor.kind == CursorKind.UNION_DECL) and cursor.is_definition():
-            decl_hash = cursor.hash
-            struct_identifier = struct_decl_hash_to_identifier.get(decl_hash)
-            
-            if not struct_identifier: 
-                struct_identifier = cursor.spelling or f"error_anon_{decl_hash}" # pragma: no cover
-
-            if is_in_system_header(cursor):
-                return
-            current_fields: Fields = []
-            for field_cursor in cursor.get_children():
-                if field_cursor.kind == CursorKind.FIELD_DECL:
-                    field_type_str = _type_to_str_revised(
-                        field_cursor.type, 
-                        struct_decl_hash_to_identifier=struct_decl_hash_to_identifier
-                    )
-                    current_fields.append((field_type_str, field_cursor.spelling))
+def _collect_structs(tu: TranslationUnit, *, by_file: bool = False,
+                     ) -> Dict[Optional[str], Tuple[Dict[str, Fields], Dict[str, Fields]]]:
+    """
+    Return ``{key: (name_to_struct, pointer_to_struct)}`` for *tu*. The key is
+    the name of the file declaring each struct / typedef when *by_file* is
+    set, and ``None`` otherwise.
+    """
+    hash_to_fields: Dict[int, Fields] = {}
+    results: Dict[Optional[str], Tuple[Dict[str, Fields], Dict[str, Fields]]] = {}
+
+    def maps_for(cursor: Cursor) -> Tuple[Dict[str, Fields], Dict[str, Fields]]:
+        key = None
+        if by_file:
+            loc_file = cursor.location.file
+            key = loc_file.name if loc_file else None
+        maps = results.get(key)
+        if maps is None:
+            maps = results[key] = ({}, {})
+        return maps
+
+    # --- Single walk: queue struct/union definitions and typedefs ---
+    # Typedefs may name records defined later in the walk, so they are only
+    # resolved once every definition has been collected.
+    STRUCT_DECL = CursorKind.STRUCT_DECL
+    UNION_DECL = CursorKind.UNION_DECL
+    TYPEDEF_DECL = CursorKind.TYPEDEF_DECL
+    FIELD_DECL = CursorKind.FIELD_DECL
+
+    definitions: List[Tuple[Cursor, int, CursorKind]] = []
+    typedefs: List[Cursor] = []
+    fields_of: Dict[int, List[Cursor]] = {}
+
+    def visit(cursor: Cursor, parent: Cursor) -> int:
+        kind = cursor.kind
+        if kind == FIELD_DECL:
+            fields = fields_of.get(parent.hash)
+            if fields is not None:
+                fields.append(cursor)
+        elif kind in _STRUCT_KINDS:
+            if cursor.is_definition():
+                decl_hash = cursor.hash
+                # The same definition is reached again through typedef /
+                # field children; only its first occurrence is walked.
+                if decl_hash in fields_of:
+                    return _CONTINUE
+                fields_of[decl_hash] = []
+                definitions.append((cursor, decl_hash, kind))
+        elif kind == TYPEDEF_DECL:
+            typedefs.append(cursor)
+        return _RECURSE
+
+    _visit(tu.cursor, visit)
+
+    # Field types repeat a lot ("int", "char*", "struct Node*"): memoize their
+    # string form per (kind, spelling). Anonymous records are left out since
+    # their spelling does not reliably identify a single declaration.
+    type_str_cache: Dict[Tuple[int, str], str] = {}
+
+    def type_to_str(t: Type) -> str:
+        key = (t.kind.value, t.spelling)
+        type_str = type_str_cache.get(key)
+        if type_str is None:
+            type_str = _type_to_str_revised(t)
+            if "anon" not in type_str and "unnamed" not in type_str:
+                type_str_cache[key] = type_str
+        return type_str
+
+    # --- Collect struct (and union) definitions and their fields ---
+    for cursor, decl_hash, kind in definitions:
+        if is_in_system_header(cursor):
+            continue
+        current_fields: Fields = []
+        for field_cursor in fields_of[decl_hash]:
+            field_type_str = type_to_str(field_cursor.type)
+            current_fields.append((sys.intern(field_type_str), sys.intern(field_cursor.spelling)))
             
-            struct_fields_map[struct_identifier] = current_fields
+        hash_to_fields[decl_hash] = current_fields
             
-            # --- MODIFIED LOGIC TO ADD TO name_to_struct FOR TAGGED STRUCTS/UNIONS ---
-            if cursor.spelling: 
+        # --- MODIFIED LOGIC TO ADD TO name_to_struct FOR TAGGED STRUCTS/UNIONS ---
+        spelling = cursor.spelling
+        if spelling: 
                 
-                is_actually_tagged_in_c = False
-                current_kind_str = ""
+            is_actually_tagged_in_c = False
+            current_kind_str = ""
 
-                if cursor.kind == CursorKind.STRUCT_DECL:
-                    current_kind_str = "struct"
-                elif cursor.kind == CursorKind.UNION_DECL: # pragma: no cover
-                    current_kind_str = "union"
+            if kind == STRUCT_DECL:
+                current_kind_str = "struct"
+            elif kind == UNION_DECL: # pragma: no cover
+                current_kind_str = "union"
                 
-                if current_kind_str: 
-                    if not cursor.is_anonymous():
-                        expected_type_spelling = f"{current_kind_str} {cursor.spelling}"
-                        if cursor.type.spelling == expected_type_spelling:
-                            is_actually_tagged_in_c = True
+            if current_kind_str: 
+                if not cursor.is_anonymous():
+                    expected_type_spelling = f"{current_kind_str} {spelling}"
+                    if cursor.type.spelling == expected_type_spelling:
+                        is_actually_tagged_in_c = True
                 
-                if is_actually_tagged_in_c:
-                    # The key format uses "struct" as per original code's examples and test failure context
-                    # For more strictness, current_kind_str should be used here too.
-                    # Sticking to "struct" to directly address the failing test key "struct Rec".
-                    # If unions were failing, this prefix would need current_kind_str.
-                    name_to_struct[f"{current_kind_str} {cursor.spelling}"] = current_fields
-            # --- END OF MODIFIED LOGIC ---
-        
-        for child in cursor.get_children():
-            collect_struct_definitions_recursive(child)
-
-    collect_struct_definitions_recursive(tu.cursor)
+            if is_actually_tagged_in_c:
+                # The key format uses "struct" as per original code's examples and test failure context
+                # For more strictness, current_kind_str should be used here too.
+                # Sticking to "struct" to directly address the failing test key "struct Rec".
+                # If unions were failing, this prefix would need current_kind_str.
+                maps_for(cursor)[0][sys.intern(expected_type_spelling)] = current_fields
+        # --- END OF MODIFIED LOGIC ---
 
-    # --- Pass 3: Process typedefs and link them to struct/union definitions ---
-    # (Using the original Pass 3 logic from the problem description)
-    def process_typedefs_recursive(cursor: Cursor):
-        if cursor.kind == CursorKind.TYPEDEF_DECL:
-            alias_name = cursor.spelling 
-            type_of_alias = cursor.type 
+    # --- Process typedefs and link them to struct/union definitions ---
+    for cursor in typedefs:
+        alias_name = cursor.spelling 
+        type_of_alias = cursor.type 
             
-            if is_in_system_header(cursor):
-                return
+        if is_in_system_header(cursor):
+            continue
             
-            ptr_depth, ultimate_base_type = _ptr_depth(type_of_alias)
+        ptr_depth, ultimate_base_type = _ptr_depth(type_of_alias)
             
-            if ultimate_base_type.kind == TypeKind.RECORD: 
-                struct_decl_cursor = ultimate_base_type.get_declaration()
-                target_struct_identifier = struct_decl_hash_to_identifier.get(struct_decl_cursor.hash)
+        if ultimate_base_type.kind == TypeKind.RECORD: 
+            fields = hash_to_fields.get(ultimate_base_type.get_declaration().hash)
                 
-                if target_struct_identifier and target_struct_identifier in struct_fields_map:
-                    fields = struct_fields_map[target_struct_identifier]
-                    
-                    if ptr_depth == 0: 
-                        name_to_struct[alias_name] = fields
-                    elif ptr_depth == 1: 
-                        pointer_to_struct[alias_name] = fields
-        
-        for child in cursor.get_children():
-            process_typedefs_recursive(child)
-            
-    process_typedefs_recursive(tu.cursor)
+            if fields is not None:
+                if ptr_depth == 0: 
+                    maps_for(cursor)[0][sys.intern(alias_name)] = fields
+                elif ptr_depth == 1: 
+                    maps_for(cursor)[1][sys.intern(alias_name)] = fields
 
-    return name_to_struct, pointer_to_struct
\ No newline at end of file
+    return results
\ No newline at end of file
@@ -1,8 +1,14 @@
+import io
 from typing import List, Dict, Tuple
 from allocator_gen import clean_key
 from extractor import Fields
 from typing import Dict, List, Tuple
 
+def param_base_type(var_type: str) -> str:
+    """'const struct Foo *' -> 'struct Foo': the name_map / ptr_map key of a parameter type."""
+    return var_type.replace('const ', '').strip().rstrip('* ')
+
+
 def generate_main_file(
     functions: Dict[tuple[str, str], list[tuple[str, str]]],
     nm:Dict[str, Fields],
@@ -12,43 +18,41 @@ def generate_main_file(
     Generates a main function that calls all functions in 'functions',
     initializing their parameters appropriately.
     """
-    output = []
-    output.append('int main(void) {')
+    buf = io.StringIO()
+    w = buf.write
+    w('int main(void) {\n')
 
-    for ret_type, func_name in functions.keys():
-        params = functions[(ret_type, func_name)]
+    for (ret_type, func_name), params in functions.items():
         if func_name == 'main': continue
-        output.append('    if(rand()){')  # New scope for each function
+        w('    if(rand()){\n')  # New scope for each function
         param_names = []
         for (var_type, var_name) in params:
             clean_type = var_type.replace('const ', '').strip()
-            struct_name = clean_key(clean_type)
+            base = param_base_type(var_type)
+            struct_name = clean_key(base)
             param_names.append(var_name)
             if '*' in clean_type:
-                if struct_name in nm:
-                    output.append(f'        {clean_type} {var_name} = alloc_{struct_name}(0, 5);')
-                elif struct_name not in pm:
-                    output.append(f'        {clean_type} {var_name} = malloc(32);')
-                    output.append(f'        auto_make_unknown({var_name}, 32);')
+                if base in nm:
+                    w(f'        {clean_type} {var_name} = alloc_{struct_name}(0, 5);\n')
+                elif base not in pm:
+                    w(f'        {clean_type} {var_name} = malloc(32);\n'
+                      f'        auto_make_unknown({var_name}, 32);\n')
             else:
-                if struct_name in nm:
-                    output.append(f'        {clean_type} {var_name};')
-                    output.append(f'        {var_name} = *alloc_{struct_name}(0, 5);')
-                elif struct_name in pm:
-                    output.append(f'        {clean_type} {var_name};')
-                    output.append(f'        {var_name} = alloc_{struct_name}(0, 5);')
+                w(f'        {clean_type} {var_name};\n')
+                if base in nm:
+                    w(f'        {var_name} = *alloc_{struct_name}(0, 5);\n')
+                elif base in pm:
+                    w(f'        {var_name} = alloc_{struct_name}(0, 5);\n')
                 elif struct_name == 'bool':
-                    output.append(f'        {clean_type} {var_name};')
-                    output.append(f'        {var_name} = tis_nondet(0, 1);')
+                    w(f'        {var_name} = tis_nondet(0, 1);\n')
                 else:
-                    output.append(f'        {clean_type} {var_name};')
-                    output.append(f'        auto_make_unknown(&{var_name}, sizeof({clean_type}));')
+                    w(f'        auto_make_unknown(&{var_name}, sizeof({clean_type}));\n')
 
         param_str = ', '.join(param_names)
-        output.append(f'        {func_name}({param_str});')
-        output.append('    }\n')
+        w(f'        {func_name}({param_str});\n')
+        w('    }\n\n')
 
-    output.append('    return 0;')
-    output.append('}')
+    w('    return 0;\n')
+    w('}')
 
-    return '\n'.join(output)
+    return buf.getvalue()
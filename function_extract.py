@@ -10,7 +10,6 @@ from __future__ import annotations
 import sys
 import re
 from pathlib import Path
-from collections import OrderedDict
 import json
 
 # Expression régulière : retourne type de retour, nom de la fonction, et sa liste d’arguments
@@ -36,6 +35,47 @@ FUNC_RE = re.compile(
     re.VERBOSE | re.MULTILINE,
 )
 
+# Ce qui peut contenir une accolade sans ouvrir/fermer de bloc : commentaires,
+# chaînes, caractères et lignes du préprocesseur (avec continuations « \ »).
+_BRACE_SCAN_RE = re.compile(
+    r"""
+        //[^\n]*
+      | /\*.*?\*/
+      | "(?:\\.|[^"\\\n])*"
+      | '(?:\\.|[^'\\\n])*'
+      | ^[ \t]*\#(?:[^\n]*\\\n)*[^\n]*
+      | (?P<brace>[{}])
+    """,
+    re.VERBOSE | re.MULTILINE | re.DOTALL,
+)
+
+def _top_level(src: str) -> str:
+    """
+    Retire le contenu des blocs { … } de premier niveau : les en-têtes de
+    fonctions sont toujours au niveau 0, inutile d’y faire tourner FUNC_RE.
+    Si les accolades ne s’équilibrent pas (#if/#else qui ouvrent chacun un
+    bloc…), on garde la source entière.
+    """
+    parts = []
+    depth = 0
+    start = 0
+    for m in _BRACE_SCAN_RE.finditer(src):
+        brace = m.group('brace')
+        if brace == '{':
+            if depth == 0:
+                parts.append(src[start:m.end()])
+            depth += 1
+        elif brace == '}':
+            if depth == 0:
+                return src
+            depth -= 1
+            if depth == 0:
+                start = m.start()
+    if depth != 0:
+        return src
+    parts.append(src[start:])
+    return "".join(parts)
+
 def _parse_args(arg_str: str) -> list[tuple[str, str]]:
     """Coupe la chaîne d’arguments 'int n, const char *s' → [('int', 'n'), ('const char *', 's')]"""
     out = []
@@ -61,8 +101,10 @@ def _parse_args(arg_str: str) -> list[tuple[str, str]]:
 
 def extract_funcs(src: str) -> dict[tuple[str, str], list[tuple[str, str]]]:
     """Retourne la map de toutes les fonctions trouvées dans une source C donnée."""
-    funcs: dict[tuple[str, str], list[tuple[str, str]]] = OrderedDict()
-    for m in FUNC_RE.finditer(src):
+    funcs: dict[tuple[str, str], list[tuple[str, str]]] = {}
+    if '{' not in src:                  # pas d’accolade : aucune définition (en-têtes…)
+        return funcs
+    for m in FUNC_RE.finditer(_top_level(src)):
         ret = " ".join(m.group('ret').split())      # normalise les espaces dans le retour
         name = m.group('name')
         args = _parse_args(m.group('args'))
@@ -74,17 +116,19 @@ def main() -> None:
         print("Usage: python parse_funcs.py fichier1.c [fichier2.c …]", file=sys.stderr)
         sys.exit(1)
 
-    result: dict[tuple[str, str], list[tuple[str, str]]] = OrderedDict()
+    result: dict[tuple[str, str], list[tuple[str, str]]] = {}
     for path in sys.argv[1:]:
         text = Path(path).read_text(encoding='utf-8', errors='ignore')
         result.update(extract_funcs(text))
 
     # Affiche en JSON, facile à consommer ailleurs
-    print(json.dumps(
+    json.dump(
         {f"{ret} {name}": args for (ret, name), args in result.items()},
+        sys.stdout,
         indent=2,
         ensure_ascii=False
-    ))
+    )
+    sys.stdout.write("\n")
 
 if __name__ == "__main__":
     main()
@@ -3,24 +3,40 @@
 Generate allocator boiler-plate for a set of C units.
 
 Usage:
-    gen_allocators.py <compile_commands.json> <file1.c> [file2.c …]
+    gen_allocators.py [--roots T1,T2] [--cache-ast] <compile_commands.json> <file1.c> [file2.c …]
 
 The script:
-  • builds a temporary translation unit that #includes all given C files;
-  • extracts pre-processing flags from compile_commands.json;
-  • calls `extractor.extract_structs` and `allocator_gen.generate_allocators`;
+  • parses each given C file on its own (in parallel) and merges the results;
+  • extracts pre-processing flags from compile_commands.json: an entry's
+    "file" is resolved against its "directory", and flags are gathered in
+    the order the C files are given (on conflicting flags, the last file wins);
+  • calls `extractor.extract_structs` and `allocator_gen.generate_allocators`
+    (restricted to the types reachable from ``--roots`` when given);
+  • with ``--cache-ast``, keeps the parsed AST under
+    ``$XDG_CACHE_HOME/cparser-ast`` and reuses it while its inputs are unchanged;
   • prints the resulting C code.
+
+Environment:
+  CLANG_LIBRARY_FILE  libclang shared library to load with the `clang` binding;
+  USE_PYLIBCLANG=1    use the faster `pylibclang` binding when installed. It
+                      ships its own libclang, so CLANG_LIBRARY_FILE is unneeded.
 """
 
 from __future__ import annotations
 
+import functools
 import json
+import os
 import shlex
 import sys
-import tempfile
 from pathlib import Path
-from typing import List, Sequence
-from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+try:  # orjson parses large compile_commands.json files several times faster
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover
+    _json_loads = json.loads
 # --------------------------------------------------------------------------- #
 # helpers                                                                     #
 # --------------------------------------------------------------------------- #
@@ -32,12 +48,29 @@ _PP_PREFIXES = (
     "-nostdinc", "-f", "-m", "-std=", "-x", "-Xclang",
 )
 
-_PP_PREFIXES_REQUIRING_SEP_ARG = {
+_PP_PREFIXES_REQUIRING_SEP_ARG = frozenset({
     "-I", "-isystem", "-iquote", "-idirafter",
     "-D", "-U", "-include", "-imacros",
     "-iprefix", "-iwithprefix", "-iwithprefixbefore",
     "-x", "-Xclang",
-}
+})
+
+@functools.lru_cache(maxsize=None)
+def _resolve(directory: str, path: str) -> str:
+    """
+    Absolute, symlink-free form of *path* relative to *directory*. Memoized:
+    compile databases repeat the same directories and -I paths for every entry.
+    """
+    return os.path.realpath(os.path.join(directory, path))
+
+def _split_command(command: str) -> List[str]:
+    """
+    Tokenise a compile command like ``shlex.split``. Commands without quotes
+    or backslashes (the usual CMake / Ninja output) take a plain str.split.
+    """
+    if '"' in command or "'" in command or "\\" in command:
+        return shlex.split(command)
+    return command.split()
 
 def _extract_pp_options(tokens: Sequence[str], base_directory: Path) -> List[str]:
     """
@@ -59,6 +92,7 @@ def _extract_pp_options(tokens: Sequence[str], base_directory: Path) -> List[str
         Tokens relevant to Clang's front-end, with relative -I paths resolved.
     """
     pp: List[str] = []
+    base_directory = os.fspath(base_directory)
     it = iter(tokens) # Create an iterator for easy `next()`
 
     for tok in it:
@@ -67,11 +101,9 @@ def _extract_pp_options(tokens: Sequence[str], base_directory: Path) -> List[str
             pp.append(tok)  # Append "-I"
             try:
                 path_arg = next(it)
-                path_obj = Path(path_arg)
                 # Resolve if relative and not a variable-like path (e.g. starting with '$')
-                if not path_obj.is_absolute() and not path_arg.startswith("$"):
-                    resolved_path = (base_directory / path_obj).resolve()
-                    pp.append(resolved_path.as_posix())
+                if not os.path.isabs(path_arg) and not path_arg.startswith("$"):
+                    pp.append(_resolve(base_directory, path_arg))
                 else:
                     pp.append(path_arg)  # Keep absolute path or variable path as is
             except StopIteration:
@@ -84,10 +116,8 @@ def _extract_pp_options(tokens: Sequence[str], base_directory: Path) -> List[str
         elif tok.startswith("-I") and len(tok) > 2:
             prefix = "-I"
             path_part = tok[len(prefix):]
-            path_obj = Path(path_part)
-            if not path_obj.is_absolute() and not path_part.startswith("$"):
-                resolved_path = (base_directory / path_obj).resolve()
-                pp.append(f"{prefix}{resolved_path.as_posix()}")
+            if not os.path.isabs(path_part) and not path_part.startswith("$"):
+                pp.append(f"{prefix}{_resolve(base_directory, path_part)}")
             else:
                 pp.append(tok)  # Keep original form (e.g. -I/abs/path or -I$SYSROOT/path)
             continue # Processed this token, move to next token
@@ -95,7 +125,7 @@ def _extract_pp_options(tokens: Sequence[str], base_directory: Path) -> List[str
         # Case 3: Other pre-processor options (macros, other includes, standards, etc.)
         # Check if the token starts with any of the known general pre-processor prefixes.
         # This handles options like -isystem, -D, -DMACRO, -std=c99, -Xclang, etc.
-        if any(tok.startswith(pref) for pref in _PP_PREFIXES):
+        if tok.startswith(_PP_PREFIXES):  # str.startswith checks the whole tuple in C
             pp.append(tok)
             # If the token *is* one that requires a separate argument
             # (e.g., tok is "-D", not "-DMACRO"; tok is "-isystem", not "-isystem/path")
@@ -119,78 +149,148 @@ def _extract_pp_options(tokens: Sequence[str], base_directory: Path) -> List[str
 # --------------------------------------------------------------------------- #
 
 
-def main() -> int:
-    if len(sys.argv) < 3:
+def _pop_roots(args: List[str]) -> Optional[List[str]]:
+    """
+    Remove ``--roots A,B`` / ``--roots=A,B`` from *args* and return the
+    listed root types, or None when the option is absent. An option that
+    names no type (``--roots=``) yields an empty list.
+    """
+    roots: Optional[List[str]] = None
+    rest: List[str] = []
+    it = iter(args)
+    for arg in it:
+        if arg == "--roots":
+            value = next(it, "")
+        elif arg.startswith("--roots="):
+            value = arg[len("--roots="):]
+        else:
+            rest.append(arg)
+            continue
+        roots = (roots or []) + [r.strip() for r in value.split(",") if r.strip()]
+    args[:] = rest
+    return roots
+
+
+def _ast_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "cparser-ast"
+
+
+def _merge_struct_maps(results) -> tuple[dict[str, list], dict[str, list]]:
+    """
+    Merge the ``{file: (name_to_struct, pointer_to_struct)}`` mapping *results*.
+    A name seen in an earlier file keeps its entry, and later aliases of that
+    struct are pointed at the same field list so they stay shared. A later
+    definition with other fields is reported on stderr, as the compiler would
+    report a redefinition.
+    """
+    nm: dict[str, list] = {}
+    pm: dict[str, list] = {}
+    for path, (nm_i, pm_i) in results.items():
+        # Each map lists a struct's own name before its typedef aliases.
+        kept: dict[int, list] = {}
+        for merged, part in ((nm, nm_i), (pm, pm_i)):
+            for name, fields in part.items():
+                if name in merged:
+                    # Aliases share their struct's list: warn once per struct.
+                    if id(fields) not in kept and merged[name] != fields:
+                        sys.stderr.write(
+                            f"Warning: '{name}' in {path} differs from its first "
+                            f"definition; keeping the first one.\n"
+                        )
+                    kept.setdefault(id(fields), merged[name])
+                else:
+                    merged[name] = kept.get(id(fields), fields)
+    return nm, pm
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the generator on *argv* (``sys.argv[1:]`` by default); return the exit status."""
+    args = list(sys.argv[1:] if argv is None else argv)
+    roots = _pop_roots(args)
+    cache_ast = "--cache-ast" in args
+    args = [a for a in args if a != "--cache-ast"]
+    if len(args) < 2 or roots == []:
+        if roots == []:
+            sys.stderr.write("Error: --roots needs at least one type name.\n")
         sys.stderr.write(
-            "Usage: gen_allocators.py <compile_commands.json> <file1.c> [file2.c …]\n"
+            "Usage: gen_allocators.py [--roots T1,T2] [--cache-ast] <compile_commands.json> <file1.c> [file2.c …]\n"
         )
         return 1
 
-    compile_db_path = Path(sys.argv[1]).resolve()
-    c_files = [Path(p).resolve() for p in sys.argv[2:]]
-    
-    for s in sys.argv[2:]:
-        print(f'#include "{s}"')
+    compile_db_path = Path(args[0]).resolve()
+    # The same file may be given through different relative spellings;
+    # keep the first spelling of each resolved path so it is included once.
+    sources: dict[Path, str] = {}
+    for s in args[1:]:
+        sources.setdefault(Path(s).resolve(), s)
+    c_files = list(sources)
+
+    sys.stdout.write("".join(f'#include "{s}"\n' for s in sources.values()))
 
     # --------------------------------------------------------------------- #
     # 1. Read compile_commands.json and gather front-end flags              #
     # --------------------------------------------------------------------- #
     try:
-        compile_db = json.loads(compile_db_path.read_text(encoding="utf-8"))
+        compile_db = _json_loads(compile_db_path.read_bytes())
     except Exception as exc:  # pragma: no cover
         sys.stderr.write(f"Error reading {compile_db_path}: {exc}\n")
         return 1
 
     clang_arguments: List[str] = []
 
+    # Index the entries of the requested files once. "file" may be relative
+    # to the entry's "directory" (not to the current directory). Flags are
+    # then gathered in command-line order, not database order.
+    db_by_file: dict[str, list[dict]] = {}
     for entry in compile_db:
-        entry_file = Path(entry.get("file", "")).resolve()
-        if entry_file not in c_files:
-            # Ignore unrelated translation units.
-            continue
-        root_path = entry.get("directory", "")
-        if "arguments" in entry:
-            tokens: Sequence[str] = entry["arguments"]
-        elif "command" in entry:
-            # Older CMake versions emit a single command-line string.
-            tokens = shlex.split(entry["command"])
-            # The first token is the compiler (“clang”), discard it.
-            tokens = tokens[1:]
-        else:  # pragma: no cover
-            continue
+        entry_file = _resolve(entry.get("directory", ""), entry.get("file", ""))
+        db_by_file.setdefault(entry_file, []).append(entry)
 
-        clang_arguments.extend(_extract_pp_options(tokens, root_path))
-        
-    
-
-    # Deduplicate while preserving order.
-    seen: set[str] = set()
-    clang_arguments = [arg for arg in clang_arguments if not (arg in seen or seen.add(arg))]
+    for c_file in c_files:
+        for entry in db_by_file.get(str(c_file), ()):
+            root_path = entry.get("directory", "")
+            if "arguments" in entry:
+                tokens: Sequence[str] = entry["arguments"]
+            elif "command" in entry:
+                # Older CMake versions emit a single command-line string.
+                tokens = _split_command(entry["command"])
+                # The first token is the compiler (“clang”), discard it.
+                tokens = tokens[1:]
+            else:  # pragma: no cover
+                continue
 
-    # --------------------------------------------------------------------- #
-    # 2. Build a temporary umbrella translation unit                        #
-    # --------------------------------------------------------------------- #
-    tmp_c_path = Path(tempfile.gettempdir()) / "tmp_combined.c"
-    with tmp_c_path.open("w", encoding="utf-8") as tmp_out:
-        for src in c_files:
-            tmp_out.write(f'#include "{src.as_posix()}"\n')
+            clang_arguments.extend(_extract_pp_options(tokens, root_path))
 
-    processed_source = tmp_c_path  # Path is accepted by extract_structs
+    # Deduplicate while preserving order.
+    clang_arguments = list(dict.fromkeys(clang_arguments))
 
     # --------------------------------------------------------------------- #
-    # 3. Extract struct metadata and generate allocator code                #
+    # 2. Extract struct metadata and generate allocator code                #
     # --------------------------------------------------------------------- #
-    from extractor import extract_structs  # type: ignore
-    from allocator_gen import generate_allocators  # type: ignore
-    from function_call_writer import generate_main_file  # type: ignore
+    from extractor import extract_structs_many  # type: ignore
+    from allocator_gen import generate_allocators, reachable_structs  # type: ignore
+    from function_call_writer import generate_main_file, param_base_type  # type: ignore
     from function_extract import extract_funcs  # type: ignore
     
-    nm, pm = extract_structs(processed_source, clang_arguments)
-    print (nm, file=sys.stderr)
-    funcs: dict[tuple[str, str], list[tuple[str, str]]] = OrderedDict()
-    for path in sys.argv[1:]:
-        text = Path(path).read_text(encoding='utf-8', errors='ignore')
+    # Files are parsed separately: a single umbrella TU of every .c file
+    # makes semantic analysis grow with the combined symbol tables.
+    per_file = extract_structs_many(
+        c_files, clang_arguments,
+        cache_dir=_ast_cache_dir() if cache_ast else None,
+    )
+    nm, pm = _merge_struct_maps(per_file)
+    funcs: dict[tuple[str, str], list[tuple[str, str]]] = {}
+    for path in c_files:
+        text = path.read_text(encoding='utf-8', errors='ignore')
         funcs.update(extract_funcs(text))
+    if roots is not None:
+        # Only emit allocators for the requested types and what they reach.
+        # The harness main() allocates every function parameter, so their
+        # types are roots too.
+        roots = roots + [param_base_type(t) for params in funcs.values() for t, _ in params]
+        nm, pm = reachable_structs(nm, pm, roots)
+    print (nm, file=sys.stderr)
     generated_allocs = generate_allocators(nm, pm)
     print(generated_allocs)
     #print(funcs)
@@ -0,0 +1,94 @@
+"""Fonctions utilitaires partagées par les tests."""
+
+import functools
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Set
+
+from allocator_gen import PRELUDE
+
+
+_ALLOC_DEF_RE = re.compile(r"alloc_(\w+)\(int d, int max_d\)\s*\{")
+_ALLOC_NAME_RE = re.compile(r"\balloc_(\w+)\s*\(")
+
+
+def _block_end(cgen: str, start: int) -> int:
+    """Indice de l'accolade fermante du bloc ouvert juste avant *start*."""
+    depth = 1
+    i = start
+    # on saute d'accolade en accolade avec str.find
+    while True:
+        nxt_o = cgen.find("{", i)
+        nxt_c = cgen.index("}", i)
+        if nxt_o == -1 or nxt_c < nxt_o:
+            depth -= 1
+            if depth == 0:
+                return nxt_c
+            i = nxt_c + 1
+        else:
+            depth += 1
+            i = nxt_o + 1
+
+
+def get_allocator_function_body(name: str, cgen: str) -> str:
+    """
+    Corps (entre accolades) de la définition de ``alloc_<name>`` dans *cgen*,
+    trouvé par comptage d'accolades plutôt que par regex.
+    """
+    head = f" alloc_{name}(int d, int max_d)\n{{"
+    start = cgen.index(head) + len(head)
+    return cgen[start:_block_end(cgen, start)]
+
+
+@functools.lru_cache(maxsize=None)
+def split_allocators(cgen: str) -> Dict[str, str]:
+    """
+    ``{nom: corps}`` pour toutes les définitions ``alloc_<nom>`` de *cgen*,
+    en une seule passe (les prototypes, terminés par ``;``, sont ignorés).
+    Le résultat est partagé entre appels : ne pas le modifier.
+    """
+    bodies = {}
+    pos = 0
+    while (m := _ALLOC_DEF_RE.search(cgen, pos)):
+        end = _block_end(cgen, m.end())
+        bodies[m.group(1)] = cgen[m.end():end]
+        pos = end + 1
+    return bodies
+
+
+def allocator_names(cgen: str) -> Set[str]:
+    """Noms ``<nom>`` de tous les ``alloc_<nom>(`` cités dans *cgen* (un seul balayage)."""
+    return set(_ALLOC_NAME_RE.findall(cgen))
+
+
+def assert_contains_all(haystack: str, needles: Iterable[str]) -> None:
+    """
+    Vérifie que chaque motif littéral de *needles* apparaît dans *haystack*,
+    en un seul balayage (alternance regex, motifs les plus longs d'abord).
+    """
+    needles = set(needles)
+    pattern = re.compile("|".join(map(re.escape, sorted(needles, key=len, reverse=True))))
+    found = set(pattern.findall(haystack))
+    # un motif chevauchant un autre déjà trouvé peut échapper au balayage
+    missing = sorted(n for n in needles - found if n not in haystack)
+    assert not missing, f"absents de la sortie : {missing}"
+
+
+def norm(s: str) -> str:
+    """Réduit toute suite de blancs à une seule espace."""
+    return " ".join(s.split())
+
+
+def assert_has_prelude(code: str) -> None:
+    """Le prélude (auto_alloc_safe / auto_make_unknown) ouvre toujours la sortie."""
+    assert code.startswith(PRELUDE)
+
+
+def fast_write(path: Path, s: str) -> None:
+    """Écrit *s* (UTF-8) dans *path* avec un seul os.write, sans TextIOWrapper."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.write(fd, s.encode("utf-8"))
+    finally:
+        os.close(fd)
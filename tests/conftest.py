@@ -0,0 +1,113 @@
+import copy
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Sequence
+
+import pytest
+
+from allocator_gen import generate_allocators
+from tests._helpers import fast_write
+
+# extractor (libclang via ctypes) n'est importé qu'au premier test qui parse :
+# une collecte seule (--collect-only, -k) ne paie pas son chargement.
+
+# Résultats d'extraction indexés par le hash du code source et les arguments : les tests qui
+# partagent un même extrait C ne le font parser qu'une fois par session.
+_extracted: dict = {}
+_generated: dict = {}
+
+
+def _digest(code: str) -> bytes:
+    return hashlib.blake2b(code.encode(), digest_size=16).digest()
+
+
+def _extracted_for(code: str, clang_args: Sequence[str]):
+    key = (_digest(code), tuple(clang_args))
+    if key not in _extracted:
+        from extractor import extract_structs
+        _extracted[key] = extract_structs(code, clang_args)
+    return key, _extracted[key]
+
+
+@pytest.fixture
+def extract():
+    """extract_structs sur du code C en mémoire, mémoïsé par contenu et arguments."""
+    def _extract(code: str, clang_args: Sequence[str] = ()):
+        _, maps = _extracted_for(code, clang_args)
+        # chaque test reçoit sa propre copie (les alias restent partagés)
+        return copy.deepcopy(maps)
+    return _extract
+
+
+@pytest.fixture(scope="session")
+def clang_index():
+    """Un seul Index libclang pour toute la session."""
+    from extractor import Index
+    return Index.create()
+
+
+@pytest.fixture
+def extract_structs():
+    """extractor.extract_structs, importé à la demande."""
+    from extractor import extract_structs
+    return extract_structs
+
+
+@pytest.fixture
+def libclang_only(monkeypatch):
+    """Désactive le chemin rapide regex : l'extraction passe par libclang ; renvoie _parse espionné."""
+    import extractor
+    calls = []
+    parse = extractor._parse
+
+    def _spy(*args, **kwargs):
+        calls.append(args)
+        return parse(*args, **kwargs)
+
+    monkeypatch.setattr(extractor, "_extract_simple_struct", lambda source: None)
+    monkeypatch.setattr(extractor, "_parse", _spy)
+    # le mémo ne distingue pas les deux chemins : on repart d'un mémo vide
+    extractor._clear_memo()
+    yield calls
+    extractor._clear_memo()
+
+
+@pytest.fixture
+def alloc():
+    """generate_allocators sur du code C en mémoire, mémoïsé par contenu et arguments."""
+    def _alloc(code: str, clang_args: Sequence[str] = ()) -> str:
+        key, maps = _extracted_for(code, clang_args)
+        if key not in _generated:
+            # generate_allocators ne modifie pas les tables : pas de copie
+            _generated[key] = generate_allocators(*maps)
+        return _generated[key]
+    return _alloc
+
+
+@pytest.fixture(scope="session")
+def c_source_dir(tmp_path_factory):
+    """Répertoire des sources C de la session, en tmpfs (/dev/shm) si possible."""
+    shm = Path("/dev/shm")
+    if not (shm.is_dir() and os.access(shm, os.W_OK)):
+        yield tmp_path_factory.mktemp("csrcs")
+        return
+    path = Path(tempfile.mkdtemp(prefix="csrcs-", dir=shm))
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def write_c(c_source_dir):
+    """Écrit chaque extrait C distinct une seule fois par session ; renvoie son chemin."""
+    def _write_c(code: str) -> Path:
+        h = hashlib.blake2b(code.encode(), digest_size=16).hexdigest()
+        path = c_source_dir / f"{h}.c"
+        if not path.exists():
+            fast_write(path, code)
+        return path
+    return _write_c
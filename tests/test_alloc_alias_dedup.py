@@ -0,0 +1,37 @@
+from allocator_gen import generate_allocators
+
+
+def test_typedef_alias_is_wrapper(write_c, extract_structs):
+    code = r"""
+        struct P { int x; int y; };
+        typedef struct P P_t;
+
+        struct Q { int x; int y; };   /* mêmes champs, autre struct */
+    """
+    f = write_c(code)
+
+    nmap, pmap = extract_structs(f)
+    cgen = generate_allocators(nmap, pmap)
+
+    # l'alias valeur délègue à l'allocateur de sa struct
+    assert "P_t* alloc_P_t(int d, int max_d)\n{\n    return alloc_struct_P(d, max_d);\n}" in cgen
+    assert "(P_t*)auto_alloc_safe" not in cgen
+
+    # une struct distincte garde son propre corps
+    assert "(struct Q*)auto_alloc_safe(sizeof(*out));" in cgen
+
+
+def test_memo_distinguishes_shared_field_lists():
+    from allocator_gen import _generate_allocators_cached
+
+    fields = [("int", "x")]
+    shared = generate_allocators({"struct P": fields, "P_t": fields}, {})
+    copied = generate_allocators({"struct P": fields, "P_t": list(fields)}, {})
+
+    # même contenu, mais seul l'alias partageant la liste devient un relais
+    assert "return alloc_struct_P(d, max_d);" in shared
+    assert "return alloc_struct_P(d, max_d);" not in copied
+
+    hits = _generate_allocators_cached.cache_info().hits
+    assert generate_allocators({"struct P": fields, "P_t": fields}, {}) is shared
+    assert _generate_allocators_cached.cache_info().hits == hits + 1
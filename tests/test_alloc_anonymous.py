@@ -1,21 +1,14 @@
-import re
-from pathlib import Path
-from extractor import extract_structs
-from allocator_gen import generate_allocators
+from tests._helpers import norm
 
 
-def test_anonymous(tmp_path: Path):
+def test_anonymous(alloc):
     code = r"""
         typedef struct {
             long id;
         } Rec;
         typedef Rec* pRec;
     """
-    f = tmp_path / "anon.c"
-    f.write_text(code)
-
-    nmap, pmap = extract_structs(f)
-    cgen = generate_allocators(nmap, pmap)
+    cgen = alloc(code)
 
     # prototypes pour alias valeur + pointeur
     assert "Rec* alloc_Rec(" in cgen
@@ -23,4 +16,4 @@ def test_anonymous(tmp_path: Path):
     assert "struct Rec *" not in cgen
 
     # pRec doit simplement faire return alloc_Rec
-    assert re.search(r"return\s+alloc_Rec\(d,\s*max_d\);", cgen)
+    assert "return alloc_Rec(d, max_d);" in norm(cgen)
@@ -2,15 +2,12 @@
 Test allocation of structs containing arrays.
 """
 
-from pathlib import Path
 import pytest
-from extractor import extract_structs
-from allocator_gen import generate_allocators
+from tests._helpers import allocator_names, assert_has_prelude
 
-def test_array_allocation(tmp_path):
-    # Create a test C file with array structs
-    c_file = tmp_path / "test.c"
-    c_file.write_text("""
+def test_array_allocation(alloc):
+    # Test C source with array structs
+    code = """
     struct ArrayStruct {
         int data[10];
         char* strings[5];
@@ -20,14 +17,11 @@ def test_array_allocation(tmp_path):
     struct Inner {
         int value;
     };
-    """)
+    """
 
     # Extract structs and generate allocators
-    name_map, ptr_map = extract_structs(c_file)
-    code = generate_allocators(name_map, ptr_map)
+    code = alloc(code)
 
     # Verify the generated code contains array handling
-    assert "alloc_struct_ArrayStruct" in code
-    assert "alloc_struct_Inner" in code
-    assert "auto_alloc_safe" in code
-    assert "auto_make_unknown" in code 
\ No newline at end of file
+    assert {"struct_ArrayStruct", "struct_Inner"} <= allocator_names(code)
+    assert_has_prelude(code)
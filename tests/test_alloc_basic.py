@@ -1,11 +1,7 @@
-import re
-from pathlib import Path
+from tests._helpers import norm
 
-from extractor import extract_structs
-from allocator_gen import generate_allocators
 
-
-def test_basic(tmp_path: Path):
+def test_basic(alloc):
     code = r"""
         struct A { int a; };
         typedef struct A* pA;     /* pointeur simple */
@@ -13,15 +9,11 @@ def test_basic(tmp_path: Path):
         struct B { char* s; };
         typedef struct B B_t;     /* alias valeur */
     """
-    f = tmp_path / "basic.c"
-    f.write_text(code)
-
-    name_map, ptr_map = extract_structs(f)
-    cgen = generate_allocators(name_map, ptr_map)
+    cgen = alloc(code)
 
     # --- prototypes attendus ----------------------------------------------
     assert "struct A* alloc_struct_A(int d, int max_d)" in cgen
-    assert re.search(r"\bpA alloc_pA\(int d, int max_d\)", cgen)
+    assert " pA alloc_pA(int d, int max_d)" in norm(cgen)
 
     # alias valeur => son propre allocateur
     assert "B_t* alloc_B_t(int d, int max_d)" in cgen
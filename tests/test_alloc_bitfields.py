@@ -2,28 +2,23 @@
 Test allocation of structs containing bitfields.
 """
 
-from pathlib import Path
 import pytest
-from extractor import extract_structs
-from allocator_gen import generate_allocators
+from tests._helpers import assert_has_prelude
 
-def test_bitfield_allocation(tmp_path):
-    # Create a test C file with bitfield structs
-    c_file = tmp_path / "test.c"
-    c_file.write_text("""
+def test_bitfield_allocation(alloc):
+    # Test C source with bitfield structs
+    code = """
     struct BitFieldStruct {
         unsigned int flags : 4;
         unsigned int mode : 2;
         unsigned int : 2;  /* unnamed bitfield */
         unsigned int status : 8;
     };
-    """)
+    """
 
     # Extract structs and generate allocators
-    name_map, ptr_map = extract_structs(c_file)
-    code = generate_allocators(name_map, ptr_map)
+    code = alloc(code)
 
     # Verify the generated code contains bitfield handling
     assert "alloc_struct_BitFieldStruct" in code
-    assert "auto_alloc_safe" in code
-    assert "auto_make_unknown" in code 
\ No newline at end of file
+    assert_has_prelude(code)
@@ -2,15 +2,12 @@
 Test allocation of complex nested structures with multiple pointer types.
 """
 
-from pathlib import Path
 import pytest
-from extractor import extract_structs
-from allocator_gen import generate_allocators
+from tests._helpers import allocator_names, assert_has_prelude
 
-def test_complex_nested_allocation(tmp_path):
-    # Create a test C file with complex nested structures
-    c_file = tmp_path / "test.c"
-    c_file.write_text("""
+def test_complex_nested_allocation(alloc):
+    # Test C source with complex nested structures
+    code = """
     struct Node {
         int value;
         struct Node* next;
@@ -28,17 +25,13 @@ def test_complex_nested_allocation(tmp_path):
 
     typedef struct Node* NodePtr;
     typedef NodePtr* NodePtrPtr;
-    """)
+    """
 
     # Extract structs and generate allocators
-    name_map, ptr_map = extract_structs(c_file)
-    code = generate_allocators(name_map, ptr_map)
+    code = alloc(code)
 
     # Verify the generated code contains complex nested structure handling
-    assert "alloc_Node(" not in code
-    assert "alloc_struct_Node(" in code
-    assert "alloc_struct_Tree(" in code
-    assert "alloc_NodePtr(" in code
-    assert "alloc_NodePtrPtr(" not in code
-    assert "auto_alloc_safe" in code
-    assert "auto_make_unknown" in code 
\ No newline at end of file
+    names = allocator_names(code)
+    assert {"struct_Node", "struct_Tree", "NodePtr"} <= names
+    assert names.isdisjoint({"Node", "NodePtrPtr"})
+    assert_has_prelude(code)
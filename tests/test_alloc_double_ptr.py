@@ -1,23 +1,16 @@
-from pathlib import Path
-from extractor import extract_structs
-from allocator_gen import generate_allocators
+from tests._helpers import allocator_names
 
 
-def test_double_pointer_exclusion(tmp_path: Path):
+def test_double_pointer_exclusion(alloc):
     code = r"""
         struct X { int v; };
         typedef struct X* pX;     // simple  => OK
         typedef struct X** ppX;   // double  => IGNORÉ
         typedef struct X*** pppX; // triple  => IGNORÉ
     """
-    f = tmp_path / "dp.c"
-    f.write_text(code)
-
-    name_map, ptr_map = extract_structs(f)
-    cgen = generate_allocators(name_map, ptr_map)
+    names = allocator_names(alloc(code))
 
     # simple pointeur         : doit exister
-    assert "alloc_pX(" in cgen
+    assert "pX" in names
     # double / triple pointeur : ne doit PAS exister
-    assert "alloc_ppX(" not in cgen
-    assert "alloc_pppX(" not in cgen
+    assert names.isdisjoint({"ppX", "pppX"})
@@ -1,10 +1,7 @@
-import re
-from pathlib import Path
-from extractor import extract_structs
-from allocator_gen import generate_allocators
+from tests._helpers import assert_contains_all, split_allocators
 
 
-def test_nested(tmp_path: Path):
+def test_nested(alloc):
     code = r"""
         struct Inner { int x; };
         typedef struct Inner Inner_t;
@@ -15,24 +12,18 @@ def test_nested(tmp_path: Path):
         };
         typedef struct Outer* pOuter;
     """
-    f = tmp_path / "nested.c"
-    f.write_text(code)
-
-    nmap, pmap = extract_structs(f)
-    cgen = generate_allocators(nmap, pmap)
+    cgen = alloc(code)
 
     print(cgen)
     # ---------------- prototypes ----------------
-    assert "struct Outer* alloc_struct_Outer(" in cgen
-    assert "pOuter alloc_pOuter(" in cgen
-    assert "Inner_t* alloc_Inner_t(" in cgen   # alias valeur
+    assert_contains_all(cgen, [
+        "struct Outer* alloc_struct_Outer(",
+        "pOuter alloc_pOuter(",
+        "Inner_t* alloc_Inner_t(",   # alias valeur
+    ])
 
     # ---------------- corps d'Outer ------------
-    body = re.search(
-        r"struct Outer\* alloc_struct_Outer\(.*?\)\s*{(?P<body>[^}]+)}",
-        cgen,
-        re.S,
-    ).group("body")
+    body = split_allocators(cgen)["struct_Outer"]
 
     # champ valeur -> *alloc_Inner
     #assert "*alloc_struct_Inner(d + 1, max_d);" in body
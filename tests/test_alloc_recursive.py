@@ -1,19 +1,18 @@
 import re
-from pathlib import Path
 
-from extractor import extract_structs
 from allocator_gen import generate_allocators
 
+_NEXT_REC = re.compile(r"out->next\s*=\s*alloc_struct_Node\(d \+ 1, max_d\);")
 
-def test_recursive(tmp_path: Path):
+
+def test_recursive(write_c, extract_structs):
     code = r"""
         struct Node {
             int id;
             struct Node* next;   // récursif
         };
     """
-    f = tmp_path / "rec.c"
-    f.write_text(code)
+    f = write_c(code)
 
     nmap, pmap = extract_structs(f)
     cgen = generate_allocators(nmap, pmap)
@@ -23,5 +22,4 @@ def test_recursive(tmp_path: Path):
     assert "struct Node* alloc_struct_Node(int d, int max_d)" in cgen
 
     # corps : doit appeler alloc_Node sur next
-    pattern = r"out->next\s*=\s*alloc_struct_Node\(d \+ 1, max_d\);"
-    assert re.search(pattern, cgen)
+    assert _NEXT_REC.search(cgen)
@@ -0,0 +1,43 @@
+from allocator_gen import generate_allocators, reachable_structs
+from tests._helpers import split_allocators
+
+
+def test_roots_prune_unreachable(write_c, extract_structs):
+    code = r"""
+        struct Leaf { int v; };
+        struct Mid  { struct Leaf* leaf; };
+        struct Top  { struct Mid mid; };
+        typedef struct Top* pTop;
+
+        struct Unused { int x; };
+        typedef struct Unused* pUnused;
+    """
+    f = write_c(code)
+
+    nmap, pmap = extract_structs(f)
+    nmap, pmap = reachable_structs(nmap, pmap, ["pTop"])
+
+    # l'alias pointeur racine entraîne sa struct et tout ce qu'elle référence
+    assert set(nmap) == {"struct Top", "struct Mid", "struct Leaf"}
+    assert set(pmap) == {"pTop"}
+
+    cgen = generate_allocators(nmap, pmap)
+    bodies = split_allocators(cgen)
+    assert "struct_Unused" not in bodies
+    assert "pUnused" not in bodies
+    assert "alloc_struct_Unused(" not in cgen
+    assert "alloc_pUnused(" not in cgen
+    assert "out->leaf = alloc_struct_Leaf(d + 1, max_d);" in bodies["struct_Mid"]
+
+
+def test_roots_accept_clean_key(write_c, extract_structs):
+    code = r"""
+        struct A { int a; };
+        struct B { struct A* a; };
+    """
+    f = write_c(code)
+
+    nmap, pmap = extract_structs(f)
+    nmap, _ = reachable_structs(nmap, pmap, ["struct_A"])
+
+    assert set(nmap) == {"struct A"}
@@ -2,15 +2,13 @@
 Test allocation of structs containing unions.
 """
 
-from pathlib import Path
 import pytest
-from extractor import extract_structs
 from allocator_gen import generate_allocators
+from tests._helpers import assert_has_prelude
 
-def test_union_allocation(tmp_path):
+def test_union_allocation(write_c, extract_structs):
     # Create a test C file with union structs
-    c_file = tmp_path / "test.c"
-    c_file.write_text("""
+    c_file = write_c("""
     struct UnionStruct {
         union {
             int i;
@@ -30,5 +28,4 @@ def test_union_allocation(tmp_path):
 
     # Verify the generated code contains union handling
     assert "alloc_struct_UnionStruct" in code
-    assert "auto_alloc_safe" in code
-    assert "auto_make_unknown" in code 
\ No newline at end of file
+    assert_has_prelude(code)
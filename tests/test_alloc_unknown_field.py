@@ -1,17 +1,14 @@
-from pathlib import Path
-from extractor import extract_structs
 from allocator_gen import generate_allocators
 
 
-def test_unknown_field(tmp_path: Path):
+def test_unknown_field(write_c, extract_structs):
     code = r"""
         struct S {
             int   n;
             char* buf;          /* pointeur vers type inconnu */
         };
     """
-    f = tmp_path / "unk.c"
-    f.write_text(code)
+    f = write_c(code)
 
     nmap, pmap = extract_structs(f)
     cgen = generate_allocators(nmap, pmap)
@@ -1,6 +1,6 @@
 from extractor import extract_structs
 
-def test_anonymous_alias(tmp_path):
+def test_anonymous_alias():
     code = r"""
         typedef struct {
             long id;
@@ -9,10 +9,7 @@ def test_anonymous_alias(tmp_path):
             long id;
         }* pRec;
     """
-    cfile = tmp_path / "t2.c"
-    cfile.write_text(code)
-
-    name_map, ptr_map = extract_structs(cfile)
+    name_map, ptr_map = extract_structs(code, filename="test_anonymous_alias.c")
     fields = [("long", "id")]
 
     # only alias names (no canonical struct key for anonymous)
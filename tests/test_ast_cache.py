@@ -0,0 +1,69 @@
+import os
+from pathlib import Path
+
+import pytest
+
+import extractor
+from extractor import extract_structs
+
+
+def test_ast_cache_roundtrip(tmp_path: Path, monkeypatch):
+    code = r"""
+        struct Node { int v; struct Node* next; };
+        typedef struct Node* pNode;
+    """
+    f = tmp_path / "cached.c"
+    f.write_text(code)
+    cache = tmp_path / "ast-cache"
+
+    first = extract_structs(f, cache_dir=cache)
+    entries = list(cache.glob("*.ast"))
+    assert len(entries) == 1
+
+    # second call (memo vidé) reloads the saved AST instead of parsing
+    extractor._clear_memo()
+    loads = []
+    real_load = extractor.TranslationUnit.from_ast_file
+    with monkeypatch.context() as m:
+        m.setattr(extractor.TranslationUnit, "from_ast_file",
+                  lambda *a, **kw: loads.append(a) or real_load(*a, **kw))
+        m.setattr(extractor, "_parse", lambda *a: pytest.fail("re-parsed despite the AST cache"))
+        assert extract_structs(f, cache_dir=cache) == first
+    assert len(loads) == 1
+
+    # a modified source gets its own entry
+    f.write_text(code + "struct Extra { char c; };")
+    assert "struct Extra" in extract_structs(f, cache_dir=cache)[0]
+    assert len(list(cache.glob("*.ast"))) == 2
+
+
+def test_ast_cache_corrupt_entry(tmp_path: Path):
+    # pas un cas trivial : le parse libclang (et donc le cache) est utilisé
+    code = "struct S { int x; };\ntypedef struct S* pS;"
+    cache = tmp_path / "ast-cache"
+
+    expected = extract_structs(code, cache_dir=cache)
+    (entry,) = cache.glob("*.ast")
+    entry.write_bytes(b"not an AST file")
+
+    # fall back to a fresh parse
+    extractor._clear_memo()
+    assert extract_structs(code, cache_dir=cache) == expected
+
+
+def test_ast_cache_follows_included_files(tmp_path: Path, capsys):
+    header = tmp_path / "h.h"
+    header.write_text("struct H { int a; };")
+    f = tmp_path / "main.c"
+    f.write_text('#include "h.h"\ntypedef struct H* pH;')
+    cache = tmp_path / "ast-cache"
+
+    assert extract_structs(f, cache_dir=cache)[0] == {"struct H": [("int", "a")]}
+
+    # seul l'en-tête change : l'entrée du cache ne doit plus servir
+    header.write_text("struct H { int a; int b; };")
+    st = header.stat()
+    os.utime(header, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert extract_structs(f, cache_dir=cache)[0] == {"struct H": [("int", "a"), ("int", "b")]}
+    # invalidée proprement, sans tentative de rechargement
+    assert "unreadable AST cache" not in capsys.readouterr().err
@@ -0,0 +1,20 @@
+from pathlib import Path
+
+from extractor import extract_structs_batch
+
+
+def test_batch_attributes_structs_to_their_header(tmp_path: Path):
+    common = tmp_path / "common.h"
+    a = tmp_path / "a.h"
+    b = tmp_path / "b.h"
+    common.write_text("#pragma once\nstruct Common { int c; };\n")
+    a.write_text('#pragma once\n#include "common.h"\nstruct A { struct Common *c; };\n')
+    b.write_text('#pragma once\n#include "a.h"\ntypedef struct A *A_p;\ntypedef struct { int y; } B_t;\n')
+
+    res = extract_structs_batch([a, b], [f"-I{tmp_path}"])
+
+    assert list(res) == [a, b]
+    assert res[a] == ({"struct A": [("struct Common*", "c")]}, {})
+    assert res[b] == ({"B_t": [("int", "y")]}, {"A_p": [("struct Common*", "c")]})
+    # l'alias défini dans b.h partage la liste de struct A (a.h)
+    assert res[b][1]["A_p"] is res[a][0]["struct A"]
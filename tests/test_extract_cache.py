@@ -0,0 +1,62 @@
+import os
+from pathlib import Path
+
+from extractor import extract_structs
+
+
+def test_cached_result_is_a_copy():
+    code = "struct A { int x; }; typedef struct A A_t;"
+
+    name_map, _ = extract_structs(code)
+    name_map["struct A"].append(("char", "junk"))
+    name_map["Z"] = []
+
+    again, _ = extract_structs(code)
+    assert again == {"struct A": [("int", "x")], "A_t": [("int", "x")]}
+    # les alias partagent toujours la même liste de champs
+    assert again["struct A"] is again["A_t"]
+
+
+def test_modified_file_is_reparsed(tmp_path: Path):
+    f = tmp_path / "m.c"
+    f.write_text("struct A { int x; };")
+    assert extract_structs(f)[0] == {"struct A": [("int", "x")]}
+
+    f.write_text("struct A { int x; int y; };")
+    st = f.stat()
+    os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert extract_structs(f)[0] == {"struct A": [("int", "x"), ("int", "y")]}
+
+
+
+def test_same_size_rewrite_with_restored_mtime_is_reparsed(tmp_path: Path):
+    f = tmp_path / "s.c"
+    f.write_text("struct A { int x; };")
+    st = f.stat()
+    assert extract_structs(f)[0] == {"struct A": [("int", "x")]}
+
+    # même taille, même mtime : seul le contenu a changé
+    f.write_text("struct A { int y; };")
+    os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert extract_structs(f)[0] == {"struct A": [("int", "y")]}
+
+
+def test_memo_key_includes_clang_args(extract):
+    code = "struct A { int x;\n#ifdef WITH_Y\n int y;\n#endif\n};"
+
+    assert extract(code)[0] == {"struct A": [("int", "x")]}
+    assert extract(code, ["-DWITH_Y"])[0] == {"struct A": [("int", "x"), ("int", "y")]}
+
+
+def test_modified_header_is_reparsed(tmp_path: Path):
+    header = tmp_path / "h.h"
+    header.write_text("struct H { int a; };")
+    f = tmp_path / "m.c"
+    f.write_text('#include "h.h"\ntypedef struct H* pH;')
+    assert extract_structs(f)[0] == {"struct H": [("int", "a")]}
+
+    # seul l'en-tête change : le mémo du fichier principal ne doit plus servir
+    header.write_text("struct H { int a; int b; };")
+    st = header.stat()
+    os.utime(header, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert extract_structs(f)[0] == {"struct H": [("int", "a"), ("int", "b")]}
@@ -0,0 +1,130 @@
+import pytest
+
+import extractor
+from extractor import extract_structs
+
+
+@pytest.fixture
+def no_libclang(monkeypatch):
+    def _fail(*args, **kwargs):
+        raise AssertionError("libclang ne devrait pas être appelé")
+    monkeypatch.setattr(extractor, "_parse", _fail)
+
+
+def test_simple_struct_skips_libclang(no_libclang):
+    code = "typedef struct Node { unsigned int v; char * *names[4]; struct Node *next; } Node_t;"
+    name_map, ptr_map = extract_structs(code)
+
+    fields = [("unsigned int", "v"), ("char**[]", "names"), ("struct Node*", "next")]
+    assert name_map == {"struct Node": fields, "Node_t": fields}
+    assert name_map["struct Node"] is name_map["Node_t"]
+    assert ptr_map == {}
+
+
+@pytest.mark.parametrize("code", [
+    "struct A { long int x; };",       # orthographe non canonique
+    "struct A { int x : 3; };",        # champ de bits
+    "struct A { int x, y; };",         # plusieurs déclarateurs
+    "struct A { int x; } a;",          # variable, pas un typedef
+])
+def test_non_trivial_struct_uses_libclang(code, monkeypatch):
+    calls = []
+    real_parse = extractor._parse
+    monkeypatch.setattr(extractor, "_parse", lambda *a: calls.append(a) or real_parse(*a))
+
+    extract_structs(code)
+    assert calls
+
+
+# Formes acceptées par le chemin rapide : chacune doit donner exactement ce
+# que libclang rapporte.
+FAST_PATH_SHAPES = [
+    "struct A { int x; };",
+    "typedef struct B { char c; double d; } B_t;",
+    "typedef struct { long l; float f; } Anon;",
+    "struct C { signed char a; unsigned char b; short c; unsigned short d; unsigned int e;"
+    " unsigned long g; long long h; unsigned long long i; long double j; _Bool k; };",
+    "struct D { char * * pp; void* v; int *ip; };",
+    "struct Node { struct Node* next; struct Other *o; };",
+    "struct E { int a[4]; char b[2][3]; char *names[8]; };",
+    "  typedef struct G { int x; }G_t;  ",
+    "struct Fwd;",
+    "struct Fwd; typedef struct Fwd Fwd;",
+    "struct Fwd; typedef struct Fwd* pFwd;",
+    "typedef int T;",
+    "",
+    "struct H { long intx; unsigned int unsignedx; };",
+    "typedef void V; typedef unsigned long long U; struct Fwd; struct Fwd;",
+]
+
+# Extraits que le chemin rapide doit laisser à libclang (type collé au nom, mots-clés)
+LIBCLANG_SHAPES = [
+    "struct A { charx; };",
+    "struct A { intv[3]; };",
+    "struct A { int asm; };",
+    "struct A { int typeof; };",
+    "struct A { int __attribute__; };",
+    "struct A { int _BitInt; };",
+    "typedef struct { int x; } typeof;",
+    "struct Fwd",
+    "typedef intT;",
+    "typedef Unknown T;",
+    "typedef int T; typedef long T;",
+    "int f(int);",
+]
+
+
+@pytest.mark.parametrize("code,taken", [(c, True) for c in FAST_PATH_SHAPES]
+                         + [(c, False) for c in LIBCLANG_SHAPES])
+def test_fast_path_matches_libclang(code, taken):
+    fast = extractor._extract_simple_struct(code)
+    assert (fast is not None) == taken
+
+    if taken:
+        tu = extractor._parse(code, ())
+        # une forme acceptée est du C valide : aucun diagnostic n'est perdu
+        assert not list(tu.diagnostics)
+        assert fast == extractor._collect_structs(tu).get(None, ({}, {}))
+
+
+@pytest.mark.parametrize("args", [
+    ["-Dx=y"],
+    ["-DA=B"],
+    ["-Dint=long"],
+    ["-x", "c++"],
+    ["-std=c23"],
+])
+def test_clang_args_bypass_fast_path(args, monkeypatch):
+    code = "struct A { int x; _Bool b; };"
+    calls = []
+    real_parse = extractor._parse
+    monkeypatch.setattr(extractor, "_parse", lambda *a: calls.append(a) or real_parse(*a))
+
+    result = extract_structs(code, args)
+    assert calls
+    assert result == extractor._collect_structs(real_parse(code, tuple(args))).get(None, ({}, {}))
+
+
+def test_source_without_braces_skips_libclang(no_libclang):
+    code = "struct Fwd; typedef struct Fwd Fwd; typedef struct Fwd* pFwd;"
+    assert extract_structs(code) == ({}, {})
+
+
+def test_source_without_braces_with_include_uses_libclang(tmp_path, monkeypatch):
+    header = tmp_path / "inj.h"
+    header.write_text("struct Inj { int v; };")
+    calls = []
+    real_parse = extractor._parse
+    monkeypatch.setattr(extractor, "_parse", lambda *a: calls.append(a) or real_parse(*a))
+
+    name_map, _ = extract_structs("typedef struct Inj Inj_t;", ["-include", str(header)])
+    assert calls
+    assert name_map == {"struct Inj": [("int", "v")], "Inj_t": [("int", "v")]}
+
+
+
+def test_source_without_braces_with_macro_uses_libclang():
+    # l'accolade n'apparaît qu'après expansion de la macro passée en -D
+    name_map, ptr_map = extract_structs("DECL(A)", ["-DDECL(n)=struct n { int x; };"])
+    assert name_map == {"struct A": [("int", "x")]}
+    assert ptr_map == {}
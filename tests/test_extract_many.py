@@ -0,0 +1,19 @@
+from pathlib import Path
+
+from extractor import extract_structs, extract_structs_many
+
+
+def test_extract_many_matches_single_calls(tmp_path: Path):
+    a = tmp_path / "a.c"
+    b = tmp_path / "b.c"
+    a.write_text("struct A { int x; }; typedef struct A *A_p;")
+    b.write_text("typedef struct { char *s; } B_t;")
+
+    res = extract_structs_many([a, b], max_workers=2)
+
+    assert list(res) == [a, b]
+    assert res[a] == extract_structs(a)
+    assert res[b] == extract_structs(b)
+    # les alias partagent toujours la même liste après le passage entre processus
+    nm, pm = res[a]
+    assert nm["struct A"] is pm["A_p"]
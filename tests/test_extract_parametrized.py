@@ -0,0 +1,116 @@
+from pathlib import Path
+
+import pytest
+
+from extractor import extract_structs, extract_structs_from_source
+
+# (nom, code C, name_map attendu, ptr_map attendu)
+CASES = [
+    (
+        "pointer_alias",
+        r"""
+        struct Foo { double x; };
+        typedef struct Foo* pFoo;
+        """,
+        {"struct Foo": [("double", "x")]},
+        {"pFoo": [("double", "x")]},
+    ),
+    (
+        "order_independent",
+        r"""
+        typedef struct Baz Baz_t;
+        typedef struct Baz* pBaz;
+        struct Baz { char c; };
+        """,
+        # nom canonique et alias
+        {"struct Baz": [("char", "c")], "Baz_t": [("char", "c")]},
+        {"pBaz": [("char", "c")]},
+    ),
+    (
+        "multi_pointer",
+        r"""
+        struct Bar { int v; };
+        typedef struct Bar** ppBar;   // double pointer ➜ must be IGNORED
+        """,
+        {"struct Bar": [("int", "v")]},
+        {},
+    ),
+    (
+        "double_pointer_exclusion",
+        r"""
+        struct X { int k; };
+        typedef struct X* pX;     // single pointer – keep
+        typedef struct X** ppX;   // double pointer – skip
+        typedef struct X*** pppX; // triple pointer – skip
+        """,
+        {"struct X": [("int", "k")]},
+        {"pX": [("int", "k")]},
+    ),
+    (
+        "forward_and_typedef",
+        r"""
+        struct A;
+        typedef struct A nA;
+        struct A { int a; char* b; };
+        typedef struct A* pA;
+        """,
+        {"struct A": [("int", "a"), ("char*", "b")], "nA": [("int", "a"), ("char*", "b")]},
+        {"pA": [("int", "a"), ("char*", "b")]},
+    ),
+    (
+        "nested_complex",
+        r"""
+        struct Outer;
+        struct Inner { int x; };
+        typedef struct Inner Inner_t;
+        typedef struct Outer* pOuter;
+        struct Outer {
+            struct Inner in;
+            double v;
+        };
+        typedef struct Outer** ppOuter;   // should be ignored (double ptr)
+
+        typedef struct {
+            int a;
+            struct Outer* link;
+        } AnonS;
+        typedef AnonS* pAnonS;
+        """,
+        {
+            "struct Inner": [("int", "x")],
+            "Inner_t": [("int", "x")],
+            "struct Outer": [("struct Inner", "in"), ("double", "v")],
+            "AnonS": [("int", "a"), ("struct Outer*", "link")],
+        },
+        {
+            "pOuter": [("struct Inner", "in"), ("double", "v")],
+            "pAnonS": [("int", "a"), ("struct Outer*", "link")],
+        },
+    ),
+]
+
+
+@pytest.mark.parametrize("name,code,exp_name,exp_ptr", CASES, ids=[c[0] for c in CASES])
+def test_extract(clang_index, name, code, exp_name, exp_ptr):
+    name_map, ptr_map = extract_structs(code, index=clang_index, filename=f"{name}.c")
+
+    assert name_map == exp_name
+    assert ptr_map == exp_ptr
+
+
+def test_very_deep_pointer(clang_index):
+    # plus profond que la limite de récursion : le parcours doit rester itératif
+    depth = 1500
+    code = "struct Deep { int " + "*" * depth + "p; };\ntypedef struct Deep" + "*" * depth + " pDeep;"
+    name_map, ptr_map = extract_structs(code, index=clang_index, filename="test_very_deep_pointer.c")
+
+    assert name_map == {"struct Deep": [("int" + "*" * depth, "p")]}
+    assert ptr_map == {}
+
+
+def test_from_source_matches_and_rejects_paths(clang_index):
+    _, code, exp_name, exp_ptr = CASES[-1]
+
+    assert extract_structs_from_source(code, index=clang_index) == (exp_name, exp_ptr)
+    with pytest.raises(TypeError):
+        extract_structs_from_source(Path("nested_complex.c"))
@@ -0,0 +1,39 @@
+from function_extract import extract_funcs
+
+
+def test_extract_funcs_ignores_function_bodies():
+    code = r"""
+        #define BEGIN {
+        static int add(int a, int b) {
+            const char *s = "} {";
+            FOREACH(item) {
+                if (a) { return b; }
+            }
+            return a + b;
+        }
+
+        struct S { int x; };
+
+        int use(struct S *p) { return p->x; }
+    """
+    funcs = extract_funcs(code)
+
+    # FOREACH(item) { … } est dans un corps : ce n'est pas une définition
+    assert list(funcs) == [("static int", "add"), ("int", "use")]
+    assert funcs[("int", "use")] == [("struct S*", "p")]
+
+
+def test_extract_funcs_unbalanced_braces_scan_whole_source():
+    code = r"""
+        #ifdef WIDE
+        int f(int a, int b) {
+        #else
+        int f(int a) {
+        #endif
+            return a;
+        }
+        int g(void) { return 0; }
+    """
+    funcs = extract_funcs(code)
+
+    assert {name for _, name in funcs} == {"f", "g"}
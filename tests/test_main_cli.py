@@ -0,0 +1,211 @@
+import json
+import os
+
+import pytest
+
+from main import _merge_struct_maps, main
+from tests._helpers import assert_contains_all, get_allocator_function_body, split_allocators
+
+_UNIT = """\
+struct S { int a;
+#ifdef WITH_B
+  char* b;
+#endif
+};
+typedef struct S* pS;
+
+struct Used { int x; };
+struct Unused { int y; };
+typedef struct Used* pUsed;
+"""
+
+_COMMON_H = """\
+#ifndef COMMON_H
+#define COMMON_H
+struct Common { int c; char* name; };
+typedef struct Common Common_t;
+#endif
+"""
+
+# deux unités incluant le même header ; struct Conf diffère d'une unité à l'autre
+_UNIT_A = """\
+#include "common.h"
+struct Conf { char* first; };
+struct A { struct Common* c; };
+typedef struct A* pA;
+"""
+
+_UNIT_B = """\
+#include "common.h"
+struct Conf { char* second; };
+typedef struct Common* pCommon;
+struct B { Common_t c; struct B* next; };
+"""
+
+
+@pytest.fixture(scope="module")
+def project(tmp_path_factory):
+    """
+    Projet d'une unité et son compile_commands.json, écrits une fois par module ;
+    renvoie leurs chemins déjà convertis en str.
+    """
+    base = tmp_path_factory.mktemp("cli_project")
+    base_s = os.fspath(base)
+    src = base / "unit.c"
+    src.write_text(_UNIT)
+    db = base / "compile_commands.json"
+    db.write_text(json.dumps([
+        {"directory": base_s, "file": "unit.c", "command": "cc -DWITH_B -c unit.c"},
+    ]))
+    return os.fspath(db), os.fspath(src)
+
+
+def test_usage_without_sources(capsys):
+    assert main(["compile_commands.json"]) == 1
+    assert capsys.readouterr().err.startswith("Usage:")
+
+
+def test_flags_from_compile_commands(project, capsys):
+    db, src = project
+
+    assert main([db, src]) == 0
+    out = capsys.readouterr().out
+    assert out.startswith(f'#include "{src}"\n')
+    assert_contains_all(out, [
+        "struct S* alloc_struct_S(int d, int max_d)",
+        "pS alloc_pS(int d, int max_d)",
+        # -DWITH_B vient de compile_commands.json : le champ b existe
+        "out->b = auto_alloc_safe(",
+    ])
+
+
+def test_roots_prune_output(project, capsys):
+    db, src = project
+
+    assert main(["--roots", "pUsed", db, src]) == 0
+    out = capsys.readouterr().out
+    assert "alloc_struct_Used(" in out
+    assert "alloc_struct_Unused(" not in out
+    assert "alloc_struct_S(" not in out
+
+
+def test_roots_keep_parameter_types(tmp_path, capsys):
+    src = tmp_path / "params.c"
+    src.write_text(
+        "struct Used { int x; };\n"
+        "typedef struct Used* pUsed;\n"
+        "struct Other { char* s; };\n"
+        "typedef struct Other* pOther;\n"
+        "struct Unused { int y; };\n"
+        "int f(pUsed u, pOther o, struct Other* o2) { return 0; }\n"
+    )
+    db = tmp_path / "compile_commands.json"
+    db.write_text(json.dumps([
+        {"directory": os.fspath(tmp_path), "file": "params.c", "command": "cc -c params.c"},
+    ]))
+
+    assert main(["--roots", "pUsed", os.fspath(db), os.fspath(src)]) == 0
+    out = capsys.readouterr().out
+    # les paramètres de f restent alloués même hors des racines
+    assert_contains_all(out, [
+        "o = alloc_pOther(0, 5);",
+        "struct Other * o2 = alloc_struct_Other(0, 5);",
+    ])
+    assert "auto_make_unknown(&o," not in out
+    assert "alloc_struct_Unused(" not in out
+
+
+def test_empty_roots_rejected(project, capsys):
+    db, src = project
+
+    assert main(["--roots=", db, src]) == 1
+    err = capsys.readouterr().err
+    assert "--roots" in err
+    assert "Usage:" in err
+
+
+@pytest.fixture(scope="module")
+def shared_header_project(tmp_path_factory):
+    """Deux unités qui partagent common.h ; renvoie les chemins (str) de la base et des sources."""
+    base = tmp_path_factory.mktemp("cli_shared")
+    (base / "common.h").write_text(_COMMON_H)
+    (base / "a.c").write_text(_UNIT_A)
+    (base / "b.c").write_text(_UNIT_B)
+    db = base / "compile_commands.json"
+    db.write_text(json.dumps([
+        {"directory": os.fspath(base), "file": name, "command": f"cc -I. -c {name}"}
+        for name in ("a.c", "b.c")
+    ]))
+    return os.fspath(db), os.fspath(base / "a.c"), os.fspath(base / "b.c")
+
+
+def test_shared_header_merged(shared_header_project, capsys):
+    db, a, b = shared_header_project
+
+    assert main([db, a, b]) == 0
+    out, err = capsys.readouterr()
+    allocators = split_allocators(out)
+    # struct Common, vue par les deux unités, n'est générée qu'une fois
+    assert out.count("struct Common* alloc_struct_Common(int d, int max_d)\n{") == 1
+    # la première définition de struct Conf (a.c) l'emporte
+    conf = get_allocator_function_body("struct_Conf", out)
+    assert "out->first" in conf
+    assert "out->second" not in conf
+    # les alias trouvés dans b.c partagent toujours la liste de champs de struct Common
+    assert "return alloc_struct_Common(d, max_d);" in allocators["pCommon"]
+    assert "return alloc_struct_Common(d, max_d);" in allocators["Common_t"]
+    # la redéfinition de struct Conf est signalée, pas celle (identique) de struct Common
+    assert f"Warning: 'struct Conf' in {b} differs" in err
+    assert err.count("Warning:") == 1
+
+
+def test_merge_struct_maps(capsys):
+    common = [("int", "c")]
+    conf_a = [("char*", "first")]
+    first = ({"struct Common": common, "struct Conf": conf_a}, {})
+
+    common_b = [("int", "c")]
+    second = (
+        {"struct Common": common_b, "Common_t": common_b, "struct Conf": [("char*", "second")]},
+        {"pCommon": common_b},
+    )
+    nm, pm = _merge_struct_maps({"a.c": first, "b.c": second})
+
+    assert list(nm) == ["struct Common", "struct Conf", "Common_t"]
+    assert nm["struct Conf"] is conf_a
+    # les alias de b.c pointent vers la liste retenue, pas vers celle de b.c
+    assert nm["Common_t"] is common
+    assert pm["pCommon"] is common
+    # un seul avertissement, pour struct Conf
+    assert capsys.readouterr().err.count("Warning:") == 1
+
+
+@pytest.fixture(scope="module")
+def relative_db_project(tmp_path_factory):
+    """Entrées dont « file » est relatif à « directory » ; les -D des deux unités se contredisent."""
+    base = tmp_path_factory.mktemp("cli_relative")
+    (base / "src").mkdir()
+    (base / "src" / "a.c").write_text(
+        "struct S {\n#if V == 1\n  char* one;\n#else\n  char* two;\n#endif\n};\n"
+    )
+    (base / "src" / "b.c").write_text("struct T { int t; };\n")
+    db = base / "compile_commands.json"
+    db.write_text(json.dumps([
+        {"directory": os.fspath(base / "src"), "file": "a.c", "command": "cc -DV=1 -c a.c"},
+        {"directory": os.fspath(base / "src"), "file": "b.c", "command": "cc -DV=2 -c b.c"},
+    ]))
+    return base, os.fspath(db), os.fspath(base / "src" / "a.c"), os.fspath(base / "src" / "b.c")
+
+
+@pytest.mark.parametrize("order,field", [("ab", "two"), ("ba", "one")])
+def test_relative_db_entries_in_command_line_order(relative_db_project, order, field,
+                                                   monkeypatch, capsys):
+    base, db, a, b = relative_db_project
+    # le répertoire courant n'est pas celui des entrées
+    monkeypatch.chdir(base)
+
+    srcs = [a, b] if order == "ab" else [b, a]
+    assert main([db, *srcs]) == 0
+    out = capsys.readouterr().out
+    # les options suivent l'ordre des fichiers sur la ligne de commande : le dernier -DV l'emporte
+    assert f"out->{field} = auto_alloc_safe(" in out
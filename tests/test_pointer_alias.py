@@ -1,18 +0,0 @@
-from extractor import extract_structs
-
-def test_pointer_alias(tmp_path):
-    code = r"""
-        struct Foo { double x; };
-        typedef struct Foo* pFoo;
-    """
-    cfile = tmp_path / "t3.c"
-    cfile.write_text(code)
-
-    name_map, ptr_map = extract_structs(cfile)
-    fields = [("double", "x")]
-
-    assert name_map["struct Foo"] == fields
-    assert ptr_map["pFoo"] == fields
-    
-    assert len(name_map.keys()) == 1
-    assert len(ptr_map.keys()) == 1
\ No newline at end of file
@@ -1,17 +1,15 @@
-from extractor import extract_structs
+from extractor import extract_structs_from_source
 
-def test_pointer_alias(tmp_path):
+def test_pointer_alias(libclang_only):
     code = r"""
         struct Foo;
         typedef struct Foo Foo;
         typedef struct Foo* pFoo;
     """
-    cfile = tmp_path / "t3.c"
-    cfile.write_text(code)
-
-    name_map, ptr_map = extract_structs(cfile)
+    name_map, ptr_map = extract_structs_from_source(code)
     fields = [("double", "x")]
 
     
     assert len(name_map.keys()) == 0
-    assert len(ptr_map.keys()) == 0
\ No newline at end of file
+    assert len(ptr_map.keys()) == 0
+    assert libclang_only
\ No newline at end of file
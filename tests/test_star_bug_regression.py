@@ -3,27 +3,26 @@ Ce test reproduit exactement le bogue 'alloc_Node*(' et vérifie qu'il a
 disparu.
 """
 import re
-from pathlib import Path
 
-from extractor import extract_structs
+from extractor import extract_structs_from_source
 from allocator_gen import generate_allocators
 
+_ALLOC_NODE_RE = re.compile(r"out->next\s*=\s*alloc_struct_Node\(d \+ 1, max_d\);")
 
-def test_no_trailing_star_on_recursive_call(tmp_path: Path):
+
+def test_no_trailing_star_on_recursive_call(libclang_only):
     csrc = r"""
         struct Node { struct Node* next; };
     """
-    fn = tmp_path / "star.c"
-    fn.write_text(csrc)
-
-    name_map, ptr_map = extract_structs(fn)
+    name_map, ptr_map = extract_structs_from_source(csrc)
+    assert libclang_only
     generated = generate_allocators(name_map, ptr_map)
 
     # Le code incorrect était 'alloc_Node*(' — il NE doit plus apparaître
     assert "alloc_Node*(" not in generated
 
     # La bonne forme doit être là
-    assert re.search(r"out->next\s*=\s*alloc_struct_Node\(d \+ 1, max_d\);", generated)
+    assert _ALLOC_NODE_RE.search(generated)
     
     
     assert len(name_map.keys()) == 1
@@ -1,6 +1,6 @@
-from extractor import extract_structs
+from extractor import extract_structs_from_source
 
-def test_pointer_alias(tmp_path):
+def test_pointer_alias():
     code = r"""
         union pthread_attr_t
         {
@@ -8,10 +8,7 @@ def test_pointer_alias(tmp_path):
             long int __align;
         };
     """
-    cfile = tmp_path / "t3.c"
-    cfile.write_text(code)
-
-    name_map, ptr_map = extract_structs(cfile)
+    name_map, ptr_map = extract_structs_from_source(code)
     fields = [('char', '__size'), ('long', '__align')]
 
     print(name_map.keys(), name_map["union pthread_attr_t"])